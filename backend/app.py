@@ -1,35 +1,310 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_socketio import SocketIO, emit, join_room
+import atexit
+import binary
+import bus
+import cluster
 import encryption
+import os
+import serializer
+from concurrent.futures import ThreadPoolExecutor
+from crypto_executor import CryptoExecutor
+from functools import partial, wraps
 from game import Game
+from gamestore import DEFAULT_STORE_PATH, SQLiteGameStore
+from keypool import DEFAULT_POOL_PATH, KeyPool
+from metrics import metrics
+from protocol import StateStream
+from registry import GameRegistry, DEFAULT_TABLE
+from spectators import SpectatorHub
 
 app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*")
+# The serializer lets handlers emit pre-encoded payloads whose public part is cached per game version
+socketio_options = {"cors_allowed_origins": "*", "json": serializer}
 
-# Initialize a new game (including scores)
-game = Game()
+# With several workers (see cluster.py), emits go through a message queue so rooms can span processes
+if cluster.MESSAGE_QUEUE:
+    client_manager = bus.create_client_manager(cluster.MESSAGE_QUEUE, json=serializer)
+    if client_manager is not None:
+        socketio_options["client_manager"] = client_manager
+    else:
+        socketio_options["message_queue"] = cluster.MESSAGE_QUEUE
+socketio = SocketIO(app, **socketio_options)
+
+DECK_WORKERS = 2  # Threads preparing decks for all tables
+DECK_QUEUE_DEPTH = 1  # Ready decks kept per table
+
+# Key generation, secure shuffles and the decryption of each deal run on worker processes;
+# under eventlet a handler waiting for them yields to the other connections.
+# The workers are forked here, before any other thread is started.
+crypto_executor = CryptoExecutor(green=socketio.async_mode == "eventlet").start()
+
+# Primes are generated ahead of time in the background so new games start quickly
+key_pool = KeyPool(path=cluster.worker_path(DEFAULT_POOL_PATH)).start()
+
+# Each table keeps its next shuffled and encrypted deck ready, built on these worker threads
+deck_executor = ThreadPoolExecutor(max_workers=DECK_WORKERS, thread_name_prefix="decks")
+
+# Tables are snapshotted and their moves logged, so games survive a restart
+# (cluster workers each get their own store and key pool file, see cluster.worker_path)
+game_store = SQLiteGameStore(path=cluster.worker_path(DEFAULT_STORE_PATH))
+atexit.register(game_store.close)
+
+# One Game per table id, so many matches can share this process
+registry = GameRegistry(game_factory=partial(Game, key_pool=key_pool, crypto=crypto_executor,
+                                             deck_executor=deck_executor, deck_queue_depth=DECK_QUEUE_DEPTH),
+                        store=game_store,
+                        game_loader=partial(Game.from_state, crypto=crypto_executor,
+                                            deck_executor=deck_executor, deck_queue_depth=DECK_QUEUE_DEPTH))
+EVICTION_INTERVAL = 60  # Seconds between idle-table sweeps
+_eviction_started = False
+
+# Public-only event stream per table for spectators
+spectators = SpectatorHub(socketio)
+
+# (table id, player) -> StateStream for clients that joined with the delta protocol
+state_streams = {}
+
+# Gauges read on every /metrics scrape
+metrics.gauge("gin_active_tables", "Tables currently held in memory.", lambda: len(registry))
+metrics.gauge("gin_connections", "Open Socket.IO connections to this process.",
+              lambda: len(socketio.server.eio.sockets))
+metrics.gauge("gin_spectators", "Spectators watching a table on this process.",
+              lambda: sum(table["spectators"] for table in spectators.stats()["tables"].values()))
+
+def get_table_id(data):
+    """
+    Extracts the table id from an event payload, falling back to the default table.
+    """
+    if not data:
+        return DEFAULT_TABLE
+    return str(data.get("table") or DEFAULT_TABLE)
+
+def player_room(table_id, player):
+    """
+    Returns the Socket.IO room name of a player seated at a table.
+    """
+    return f"{table_id}:{player}"
+
+def table_room(table_id):
+    """
+    Returns the Socket.IO room shared by everyone at a table.
+    """
+    return f"table:{table_id}"
+
+@metrics.timed("call")
+def send_state(table_id, game, player, message=None):
+    """
+    Sends a player their view of the game. Clients on the delta protocol receive
+    only the fields and hand operations that changed (state_delta); older clients
+    receive the full update_game payload, built from the cached public state.
+    """
+    stream = state_streams.get((table_id, player))
+    if stream is None:
+        payload = serializer.encode_player_view(game, player, message)
+        socketio.emit("update_game", payload, room=player_room(table_id, player))
+        return
+    delta = stream.delta(serializer.player_view(game, player, message))
+    if delta is not None:
+        emit_stream(table_id, player, stream, "state_delta", delta)
+
+@metrics.timed("call")
+def send_snapshot(table_id, game, player, message=None):
+    """
+    Sends a full state_snapshot to a delta-protocol client and restarts its delta stream from it.
+    """
+    stream = state_streams.setdefault((table_id, player), StateStream())
+    snapshot = stream.snapshot(serializer.player_view(game, player, message))
+    emit_stream(table_id, player, stream, "state_snapshot", snapshot)
+
+def emit_stream(table_id, player, stream, event, payload):
+    """
+    Emits a snapshot or delta in the encoding negotiated with the client: as
+    JSON under its own event name, or as one msgpack envelope on state_binary.
+    """
+    if stream.encoding == binary.ENCODING_MSGPACK:
+        socketio.emit("state_binary", binary.pack(payload), room=player_room(table_id, player))
+    else:
+        socketio.emit(event, payload, room=player_room(table_id, player))
+
+def send_table_state(table_id, game, message=None):
+    """
+    Sends both seated players their view of the game, with the message (if any)
+    going to both.
+    """
+    for player in game.players:
+        send_state(table_id, game, player, message)
+
+@metrics.timed("call")
+def announce_result(table_id, game, player, result):
+    """
+    Announces the end of a round (after a knock or gin by player) to the table
+    and its spectators, as game_over when someone reached the target score.
+    """
+    final_result = game.check_game_over()
+    if final_result:
+        registry.finish(table_id)  # Nothing left to restore; drop the keys and move log
+        socketio.emit("game_over", final_result, room=table_room(table_id))
+        spectators.publish(table_id, game, "game_over", player=player, result=final_result)
+    else:
+        socketio.emit("round_over", result, room=table_room(table_id))
+        spectators.publish(table_id, game, "round_over", player=player, result=result)
+
+def evict_idle_tables():
+    """
+    Background task that periodically drops tables nobody has touched for a while.
+    """
+    while True:
+        socketio.sleep(EVICTION_INTERVAL)
+        for table_id in registry.evict_idle():
+            print(f"[registry] Evicted idle table {table_id}")
+            for key in [key for key in state_streams if key[0] == table_id]:
+                del state_streams[key]
+            spectators.remove_table(table_id)
+
+def start_eviction_task():
+    """
+    Starts the idle-table sweeper once per process.
+    """
+    global _eviction_started
+    if not _eviction_started:
+        _eviction_started = True
+        socketio.start_background_task(evict_idle_tables)
+
+# Event name -> {"events", "decryptions", "last"}: how many card decryptions each event performs
+decryption_stats = {}
+
+def track_decryptions(handler):
+    """
+    Decorator for Socket.IO handlers that records how many card decryptions
+    the handler performed on its table's game.
+    """
+    @wraps(handler)
+    def wrapper(data=None):
+        table_id = get_table_id(data)
+        before_game = registry.tables.get(table_id)
+        before = before_game.decryption_count() if before_game else 0
+        result = handler(data)
+        after_game = registry.tables.get(table_id)
+        after = after_game.decryption_count() if after_game else 0
+        if after_game is not before_game:
+            before = 0  # The handler replaced the game, count everything the new one did
+        stats = decryption_stats.setdefault(handler.__name__, {"events": 0, "decryptions": 0, "last": 0})
+        stats["events"] += 1
+        stats["decryptions"] += after - before
+        stats["last"] = after - before
+        return result
+    return wrapper
+
+def owned_tables_only(handler):
+    """
+    Decorator for Socket.IO handlers that turns away events for tables owned
+    by another worker, telling the client where the table lives instead.
+    """
+    @wraps(handler)
+    def wrapper(data=None):
+        table_id = get_table_id(data)
+        if not cluster.owns(table_id):
+            emit("wrong_worker", {"table": table_id, "url": cluster.owner_url(table_id)})
+            return
+        return handler(data)
+    return wrapper
+
+@app.route("/route", methods=["GET"])
+def get_route():
+    """
+    Endpoint telling clients which worker owns a table (?table=<id>). In
+    single-process mode url is null: this server hosts every table.
+    """
+    table_id = get_table_id(request.args)
+    return jsonify({"table": table_id, "url": cluster.owner_url(table_id), "workers": len(cluster.WORKER_URLS) or 1})
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """
+    Endpoint exposing latency histograms per Socket.IO event and per crypto,
+    proof, solver and emit call, modular exponentiation counts, and the
+    active tables and connections, in the Prometheus text format.
+    """
+    if not metrics.enabled:
+        return Response("Metrics are disabled (GIN_METRICS=0)\n", status=404, mimetype="text/plain")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/decryption_stats", methods=["GET"])
+def get_decryption_stats():
+    """
+    Endpoint reporting how many decryptions each Socket.IO event performs.
+    """
+    return jsonify(decryption_stats)
+
+@app.route("/deck_pipeline_stats", methods=["GET"])
+def get_deck_pipeline_stats():
+    """
+    Endpoint reporting, per table, how many prepared decks are queued and how
+    long the last refills took.
+    """
+    with registry.lock:
+        tables = list(registry.tables.items())
+    return jsonify({table_id: game.deck_pipeline.stats() for table_id, game in tables})
+
+@app.route("/crypto_stats", methods=["GET"])
+def get_crypto_stats():
+    """
+    Endpoint reporting the crypto executor's worker count and how long its
+    key generations, shuffles and batch decryptions take.
+    """
+    return jsonify(crypto_executor.stats())
+
+@app.route("/spectator_stats", methods=["GET"])
+def get_spectator_stats():
+    """
+    Endpoint reporting how many spectators watch each table, how many of them
+    are lagging behind, and how many events were skipped for slow spectators.
+    """
+    return jsonify(spectators.stats())
+
+@app.route("/game_store_stats", methods=["GET"])
+def get_game_store_stats():
+    """
+    Endpoint reporting how many writes the game store has committed and in how many batches.
+    """
+    return jsonify(game_store.stats())
 
 @app.route("/start_game", methods=["GET"])
 def start_game():
     """
-    Endpoint to start a new game. It initializes the game by resetting 
-    the game state.
+    Endpoint to start a new game. It initializes the game on the requested
+    table (?table=<id>) by resetting the game state.
     """
-    global game
-    game = Game()
+    table_id = get_table_id(request.args)
+    if not cluster.owns(table_id):
+        return jsonify({"error": "Table is hosted by another worker", "url": cluster.owner_url(table_id)}), 421
+    registry.new_game(table_id)
     return jsonify({"message": "Game started!"})
 
 @socketio.on("new_hand")
+@metrics.timed("event", "new_hand")
+@owned_tables_only
+@track_decryptions
 def handle_new_hand(data):
     """
     Event handler for dealing a new hand to a player. 
     """
+    game = registry.get(get_table_id(data))
     player = data.get("player")
     toIndex = data.get("toIndex")
     fromIndex = data.get("fromIndex")
     game.players[player].sethand(toIndex, fromIndex)  # Update player's hand with new cards
+    table_id = get_table_id(data)
+    registry.record(table_id, game, {"type": "arrange", "player": player, "from": fromIndex, "to": toIndex})
+    if (table_id, player) in state_streams:
+        # Confirm the new order to delta clients as a single move operation
+        send_state(table_id, game, player)
 
 @socketio.on("join_game")
+@metrics.timed("event", "join_game")
+@owned_tables_only
+@track_decryptions
 def handle_join(data):
     """
     Event handler for when a player joins the game. The player's hand is 
@@ -39,217 +314,175 @@ def handle_join(data):
     if not player:
         print("Error: No player id provided in join_game event!")
         return
-    join_room(player)
+    table_id = get_table_id(data)
+    game = registry.get(table_id)
+    join_room(player_room(table_id, player))
+    join_room(table_room(table_id))
+    start_eviction_task()
 
-    player_encrypted_hand = game.players[player].hand
-    opponent = "player1" if player == "player2" else "player2"
-    opponent_count = len(game.players[opponent].hand)
+    # Clients that speak the delta protocol get a snapshot and deltas from then on,
+    # encoded as msgpack when they ask for it and the server has it
+    if data.get("protocol") == "delta":
+        state_streams[(table_id, player)] = StateStream(binary.negotiate(data.get("encoding")))
+        send_snapshot(table_id, game, player, f"Joined as {player}")
+        return
+    state_streams.pop((table_id, player), None)
 
     # Initial state to send to the player, informing them of the game status
-    initial_state = {
-        "message": f"Joined as {player}",
-        "deck_size": len(game.deck.encrypted_deck),
-        "turn": game.turn,
-        "pending": game.pending,
-        "hand": game.players[player].reveal_hand(),
-        "opponent_count": opponent_count,
-        "discard_string": game.discard_string,
-        "scores": game.scores
-    }
-    emit("update_game", initial_state, room=player)
+    send_state(table_id, game, player, f"Joined as {player}")
+
+@socketio.on("spectate")
+@metrics.timed("event", "spectate")
+@owned_tables_only
+def handle_spectate(data):
+    """
+    Event handler for a viewer who wants to watch a table. The viewer gets a
+    spectator_snapshot of the public state, then the table_event stream.
+    No hand is ever sent to spectators.
+    """
+    table_id = get_table_id(data)
+    game = registry.get(table_id)
+    spectators.join(request.sid, table_id, game)
+
+@socketio.on("disconnect")
+@metrics.timed("event", "disconnect")
+def handle_disconnect(reason=None):
+    """
+    Stops streaming to a spectator whose socket went away.
+    """
+    spectators.leave(request.sid)
+
+@socketio.on("resync")
+@metrics.timed("event", "resync")
+@owned_tables_only
+@track_decryptions
+def handle_resync(data):
+    """
+    Event handler for a delta-protocol client that missed an update (it saw a gap
+    in the sequence numbers). The client receives a fresh full snapshot.
+    """
+    player = data.get("player")
+    if not player:
+        return
+    table_id = get_table_id(data)
+    game = registry.get(table_id)
+    send_snapshot(table_id, game, player)
 
 @socketio.on("draw_card")
+@metrics.timed("event", "draw_card")
+@owned_tables_only
+@track_decryptions
 def handle_draw_card(data):
     """
     Event handler for when a player draws a card. It checks whether the action is 
     valid. After a valid draw, the game state is updated and sent to both players.
     """
+    table_id = get_table_id(data)
+    game = registry.get(table_id)
     player = data["player"]
     source = data.get("source", "stock")
     response = game.draw_card(player, source)
 
     if "error" in response:
-        player_hand = game.players[player].reveal_hand()
-        opponent = "player1" if player == "player2" else "player2"
-        opponent_count = len(game.players[opponent].hand)
-        error_state = {
-            "message": response["error"],
-            "deck_size": len(game.deck.encrypted_deck),
-            "turn": game.turn,
-            "pending": game.pending,
-            "hand": player_hand,
-            "opponent_count": opponent_count,
-            "discard_string": game.discard_string,
-            "scores": game.scores
-        }
-        emit("update_game", error_state, room=player)
+        send_state(table_id, game, player, response["error"])
         return
 
-    # If the card is valid, update the game state and send the updated info to both players
-    player_hand = game.players[player].reveal_hand()
+    registry.record(table_id, game, {"type": "draw", "player": player, "source": source})
+
+    # If the card is valid, send the updated state to both players
     opponent = "player1" if player == "player2" else "player2"
-    opponent_count = len(game.players[opponent].hand)
-
-    current_response = {
-        "message": response.get("message", ""),
-        "deck_size": response.get("deck_size"),
-        "turn": game.turn,
-        "pending": game.pending,
-        "hand": player_hand,
-        "opponent_count": opponent_count,
-        "discard_string": game.discard_string,
-        "scores": game.scores
-    }
-    
-    opponent_response = {
-        "deck_size": response.get("deck_size"),
-        "turn": game.turn,
-        "pending": game.pending,
-        "opponent_count": len(game.players[player].hand),
-        "discard_string": game.discard_string,
-        "scores": game.scores
-    }
-
-    emit("update_game", current_response, room=player)
-    emit("update_game", opponent_response, room=opponent)
+    send_state(table_id, game, player, response.get("message", ""))
+    send_state(table_id, game, opponent)
+    spectators.publish(table_id, game, "draw", player=player, source=source)
 
 @socketio.on("discard_card")
+@metrics.timed("event", "discard_card")
+@owned_tables_only
+@track_decryptions
 def handle_discard_card(data):
     """
     Event handler for when a player discards a card. If a player wins after discarding, 
     the round is concluded, and the result is broadcast to all players.
     """
+    table_id = get_table_id(data)
+    game = registry.get(table_id)
     player = data["player"]
     card_index = data.get("cardIndex")
     response = game.discard_card(player, card_index)
     
     if "error" in response:
-        player_hand = game.players[player].reveal_hand()
-        opponent = "player1" if player == "player2" else "player2"
-        opponent_count = len(game.players[opponent].hand)
-        error_state = {
-            "message": response["error"],
-            "deck_size": len(game.deck.encrypted_deck),
-            "turn": game.turn,
-            "pending": game.pending,
-            "hand": player_hand,
-            "opponent_count": opponent_count,
-            "discard_string": game.discard_string,
-            "scores": game.scores
-        }
-        emit("update_game", error_state, room=player)
+        send_state(table_id, game, player, response["error"])
         return
 
+    spectators.publish(table_id, game, "discard", player=player, card=game.discard_string)
+
+    # Replaying a discard also re-runs the gin check (see Game.apply_move). The move is
+    # recorded after the check, so a snapshot it triggers already holds the gin score.
     winner_info = game.check_for_winner(player)
+    registry.record(table_id, game, {"type": "discard", "player": player, "index": card_index})
     if winner_info:
-        final_result = game.check_game_over()
-        if final_result:
-            socketio.emit("game_over", final_result)
-        else:
-            socketio.emit("round_over", winner_info)
+        announce_result(table_id, game, player, winner_info)
         return
 
-    player_hand = game.players[player].reveal_hand()
     opponent = "player1" if player == "player2" else "player2"
-    opponent_count = len(game.players[opponent].hand)
-
-    current_response = {
-        "message": response.get("message", ""),
-        "deck_size": response.get("deck_size"),
-        "turn": game.turn,
-        "pending": game.pending,
-        "hand": player_hand,
-        "opponent_count": opponent_count,
-        "discard_string": game.discard_string,
-        "scores": game.scores
-    }
-    opponent_response = {
-        "deck_size": response.get("deck_size"),
-        "turn": game.turn,
-        "pending": game.pending,
-        "opponent_count": len(game.players[player].hand),
-        "discard_string": game.discard_string,
-        "scores": game.scores
-    }
-
-    emit("update_game", current_response, room=player)
-    emit("update_game", opponent_response, room=opponent)
+    send_state(table_id, game, player, response.get("message", ""))
+    send_state(table_id, game, opponent)
 
 @socketio.on("knock")
+@metrics.timed("event", "knock")
+@owned_tables_only
+@track_decryptions
 def handle_knock(data):
     """
     Event handler for when a player knocks, signaling the end of the round.
     After the knock, the game checks for the winner and sends the result.
     """
+    table_id = get_table_id(data)
+    game = registry.get(table_id)
     player = data["player"]
     response = game.knock(player)
     if "error" in response:
-        emit("knock_error", response, room=player)
+        emit("knock_error", response, room=player_room(table_id, player))
     else:
-        final_result = game.check_game_over()
-        if final_result:
-            socketio.emit("game_over", final_result)
-        else:
-            socketio.emit("round_over", response)
+        registry.record(table_id, game, {"type": "knock", "player": player})
+        announce_result(table_id, game, player, response)
 
 @socketio.on("new_round")
-def handle_new_round():
+@metrics.timed("event", "new_round")
+@owned_tables_only
+@track_decryptions
+def handle_new_round(data=None):
     """
     This function handles the start of a new round. It resets the round state
     (without resetting the scores) and sends the updated game state to each player.
     """
+    table_id = get_table_id(data)
+    game = registry.get(table_id)
     game.reset_round(reset_scores=False)
-    for p in game.players:
-        p_hand = game.players[p].reveal_hand()
-        opp = "player1" if p == "player2" else "player2"
-        opp_count = len(game.players[opp].hand)
-        new_state = {
-            "message": "New round started",
-            "deck_size": len(game.deck.encrypted_deck),
-            "turn": game.turn,
-            "pending": game.pending,
-            "hand": p_hand,
-            "opponent_count": opp_count,
-            "discard_string": game.discard_string,
-            "scores": game.scores
-        }
-        emit("update_game", new_state, room=p)
+    registry.save(table_id, game)  # A new deal is not replayable, so it is snapshotted
+    send_table_state(table_id, game, "New round started")
+    spectators.publish(table_id, game, "new_round")
 
 @socketio.on("new_game")
-def handle_new_game():
+@metrics.timed("event", "new_game")
+@owned_tables_only
+@track_decryptions
+def handle_new_game(data=None):
     """
     This function starts a completely new game. It resets all game elements, including the score,
-    shuffles and deals new cards, and broadcasts the new game state to all players.
+    shuffles and deals new cards, and broadcasts the new game state to everyone at the table.
     """
-    global game
-    game = Game()
+    table_id = get_table_id(data)
+    game = registry.new_game(table_id)
     print("[new_game] Current turn:", game.turn)
     for p in game.players:
-        p_hand = game.players[p].reveal_hand()
-        opp = "player1" if p == "player2" else "player2"
-        opp_count = len(game.players[opp].hand)
-        game_state = {
-            "message": "New game started",
-            "deck_size": len(game.deck.encrypted_deck),
-            "turn": game.turn,
-            "pending": game.pending,
-            "hand": p_hand,
-            "opponent_count": opp_count,
-            "discard_string": game.discard_string,
-            "scores": game.scores
-        }
         socketio.sleep(0.1)
-        emit("update_game", game_state, room=p)
-    
-    broadcast_state = {
-        "message": "A new game has started!",
-        "scores": game.scores,
-        "turn": game.turn,
-        "discard_string": game.discard_string,
-        "deck_size": len(game.deck.encrypted_deck)
-    }
+        send_state(table_id, game, p, "New game started")
+
     socketio.sleep(0.1)
-    emit("update_game", broadcast_state, broadcast=True)
+    emit("update_game", serializer.encode_public_view(game, "A new game has started!"), room=table_room(table_id))
+    spectators.publish(table_id, game, "new_game")
 
 if __name__ == "__main__":
-    socketio.run(app, host="0.0.0.0", port=5000, debug=True)
+    # Cluster workers run without the debug reloader, which would fork a second process
+    socketio.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=not cluster.WORKER_URLS)
@@ -0,0 +1,200 @@
+"""
+Load test of the multi-process deployment: starts a cluster (see cluster.py)
+with 1, 2, 4... workers, plays the same number of tables per worker over real
+Socket.IO connections, and reports moves per second. With enough cores,
+throughput should grow close to linearly with the worker count, because every
+table is served by exactly one worker.
+
+Each table is driven by its own client process (two socketio.Client
+connections); a move is one draw or one discard, timed until the server's
+answer arrives. Requires the Socket.IO client extras:
+    pip install "python-socketio[client]"
+
+Usage (from the backend folder):
+    python benchmarks/bench_cluster.py [seconds] [workers ...]
+"""
+import multiprocessing
+import queue
+import sys
+import time
+import urllib.request
+import common
+import cluster
+import socketio
+
+TABLES_PER_WORKER = 2
+BASE_PORT = 5201
+BUS_URL = "unix:///tmp/gin-rummy-bench-bus.sock"
+STARTUP_TIMEOUT = 60
+ANSWER_TIMEOUT = 30
+
+def wait_until_ready(urls):
+    """
+    Polls every worker's /route endpoint until it answers.
+    """
+    deadline = time.time() + STARTUP_TIMEOUT
+    for url in urls:
+        while True:
+            try:
+                urllib.request.urlopen(url + "/route").read()
+                break
+            except OSError:
+                if time.time() > deadline:
+                    raise RuntimeError(f"Worker {url} did not start")
+                time.sleep(0.2)
+
+def pick_tables(urls, per_worker):
+    """
+    Returns (table id, owner url) pairs with exactly per_worker tables on each worker.
+    """
+    tables = []
+    counts = {url: 0 for url in urls}
+    index = 0
+    while len(tables) < per_worker * len(urls):
+        table_id = f"load-{index}"
+        url = cluster.owner_url(table_id, urls)
+        if counts[url] < per_worker:
+            counts[url] += 1
+            tables.append((table_id, url))
+        index += 1
+    return tables
+
+class TableDriver:
+    def __init__(self, url, table_id):
+        """
+        Two connected players at one table; answers to each player's actions
+        are collected in that player's queue.
+        """
+        self.url = url
+        self.table_id = table_id
+        self.answers = {}
+        self.clients = {}
+        for player in ("player1", "player2"):
+            answers = queue.Queue()
+            client = socketio.Client()
+            for event in ("update_game", "round_over", "game_over", "knock_error"):
+                client.on(event, lambda data, event=event, answers=answers: answers.put((event, data)))
+            client.connect(url, transports=["websocket"])
+            self.answers[player] = answers
+            self.clients[player] = client
+
+    def request(self, player, event, payload, accept=None):
+        """
+        Emits an event for a player and waits for that player's next answer
+        (the next one accept(event, data) approves of, if given).
+        Returns (answer event, data).
+        """
+        answers = self.answers[player]
+        while not answers.empty():
+            answers.get_nowait()
+        self.clients[player].emit(event, dict(payload, table=self.table_id))
+        while True:
+            answer = answers.get(timeout=ANSWER_TIMEOUT)
+            if accept is None or accept(*answer):
+                return answer
+
+    def close(self):
+        for client in self.clients.values():
+            client.disconnect()
+
+def draw_answer(player):
+    """
+    Returns an accept function for the answer to player's draw: the card drawn
+    or an error on player's turn. Updates sent for the opponent's discard or
+    for a new deal may still be in flight and are skipped.
+    """
+    def accept(event, data):
+        if event != "update_game":
+            return True
+        return data.get("pending") == player or (bool(data.get("message")) and data.get("turn") == player)
+    return accept
+
+def deal_answer(message):
+    """
+    Returns an accept function for the last update sent after a new deal, so
+    that the round_over broadcast or earlier updates are not mistaken for it.
+    """
+    def accept(event, data):
+        return event == "update_game" and data.get("message") == message
+    return accept
+
+def play_table(args):
+    """
+    Plays one table for duration seconds (run in a separate process).
+    Returns (moves, latencies in seconds, errors).
+    """
+    url, table_id, duration = args
+    driver = TableDriver(url, table_id)
+    turn = None
+    for player in ("player1", "player2"):
+        _, state = driver.request(player, "join_game", {"player": player})
+        turn = state["turn"]
+
+    moves, latencies, errors = 0, [], 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        start = time.perf_counter()
+        event, data = driver.request(turn, "draw_card", {"player": turn, "source": "stock"}, draw_answer(turn))
+        latencies.append(time.perf_counter() - start)
+        if event != "update_game" or data.get("pending") != turn:
+            # Stock exhausted (or an unexpected answer): deal a new round and continue
+            errors += "No cards left" not in str(data.get("message", ""))
+            driver.request("player1", "new_round", {}, deal_answer("New round started"))
+            turn = "player1"
+            continue
+
+        start = time.perf_counter()
+        event, data = driver.request(turn, "discard_card", {"player": turn, "cardIndex": 0})
+        latencies.append(time.perf_counter() - start)
+        moves += 2
+        if event in ("round_over", "game_over"):
+            if event == "game_over":
+                driver.request("player1", "new_game", {}, deal_answer("A new game has started!"))
+            else:
+                driver.request("player1", "new_round", {}, deal_answer("New round started"))
+            turn = "player1"
+        else:
+            turn = data["turn"]
+    driver.close()
+    return moves, latencies, errors
+
+def run(workers, duration):
+    """
+    Starts a cluster with the given number of workers and plays
+    TABLES_PER_WORKER tables on each of them at once.
+    """
+    broker, processes, urls = cluster.start_workers(workers, BASE_PORT, message_queue=BUS_URL, quiet=True)
+    try:
+        wait_until_ready(urls)
+        tables = pick_tables(urls, TABLES_PER_WORKER)
+        with multiprocessing.Pool(len(tables)) as pool:
+            results = pool.map(play_table, [(url, table_id, duration) for table_id, url in tables])
+    finally:
+        cluster.stop_workers(broker, processes)
+
+    moves = sum(result[0] for result in results)
+    latencies = [sample for result in results for sample in result[1]]
+    errors = sum(result[2] for result in results)
+    return {
+        "workers": workers,
+        "tables": len(tables),
+        "moves_per_second": moves / duration,
+        "p50_ms": 1000 * common.percentile(latencies, 50),
+        "p99_ms": 1000 * common.percentile(latencies, 99),
+        "errors": errors
+    }
+
+def main(duration=10.0, worker_counts=(1, 2, 4)):
+    baseline = None
+    for workers in worker_counts:
+        result = run(workers, duration)
+        baseline = baseline or result["moves_per_second"] / workers
+        result["speedup"] = result["moves_per_second"] / baseline
+        print(f"{workers:>2} workers, {result['tables']:>2} tables: {result['moves_per_second']:8.1f} moves/s  "
+              f"p50={result['p50_ms']:7.2f} ms  p99={result['p99_ms']:7.2f} ms  errors={result['errors']}  "
+              f"speedup x{result['speedup']:.2f} (ideal x{workers})")
+    print(f"({multiprocessing.cpu_count()} CPUs: speedup is bounded by the cores the workers can use)")
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0,
+         tuple(int(arg) for arg in sys.argv[2:]) or (1, 2, 4))
@@ -0,0 +1,78 @@
+"""
+Checks the bitmask meld solver against the original recursive solver on
+random hands and benchmarks both.
+
+Usage (from the backend folder):
+    python benchmarks/bench_deadwood.py [hands]
+"""
+import random
+import sys
+import common
+from game import compute_min_deadwood, compute_min_deadwood_reference
+from melds import hand_mask, mask_points, solve_hand, solve_mask
+
+# Hands that force deep searches: long same-suit runs overlapping with sets
+WORST_CASE_HANDS = [
+    [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11],
+    [1, 2, 3, 4, 14, 15, 16, 17, 27, 28, 29],
+    [4, 5, 6, 7, 17, 18, 19, 20, 30, 31, 32],
+    [10, 11, 12, 13, 23, 24, 25, 26, 36, 37, 38],
+]
+
+def random_hands(count, seed=1234):
+    """
+    Deals count random 10- and 11-card hands with a fixed seed.
+    """
+    rng = random.Random(seed)
+    return [rng.sample(range(1, 53), rng.choice((10, 11))) for _ in range(count)]
+
+def clustered_hands(count, seed=4321):
+    """
+    Deals hands from a narrow band of ranks so that sets and runs overlap often.
+    """
+    rng = random.Random(seed)
+    hands = []
+    for _ in range(count):
+        low = rng.randint(1, 9)
+        band = [suit * 13 + rank for suit in range(4) for rank in range(low, low + 5)]
+        hands.append(rng.sample(band, rng.choice((10, 11))))
+    return hands
+
+def check_equivalence(hands):
+    """
+    Asserts that both solvers agree on every hand and that solve_hand returns
+    a partition of the hand whose deadwood cards add up to the score.
+    """
+    for hand in hands:
+        expected = compute_min_deadwood_reference(hand)
+        actual = compute_min_deadwood(hand)
+        assert actual == expected, f"Mismatch on {hand}: {actual} != {expected}"
+        arrangement = solve_hand(hand)
+        used = [card for meld in arrangement["melds"] for card in meld] + arrangement["deadwood_cards"]
+        assert sorted(used) == sorted(hand), f"Arrangement does not partition {hand}"
+        assert mask_points(hand_mask(arrangement["deadwood_cards"])) == expected
+
+def main(count=2000):
+    hands = random_hands(count) + clustered_hands(count // 2) + WORST_CASE_HANDS
+    check_equivalence(hands)
+    print(f"Solvers agree on {len(hands)} hands")
+
+    def run_reference():
+        for hand in hands:
+            compute_min_deadwood_reference(hand)
+
+    def run_bitmask():
+        solve_mask.cache_clear()  # Measure cold solves, not cache hits
+        for hand in hands:
+            compute_min_deadwood(hand)
+
+    common.report(f"reference solver ({len(hands)} hands)", common.time_calls(run_reference, 3))
+    common.report(f"bitmask solver ({len(hands)} hands)", common.time_calls(run_bitmask, 3))
+    common.report("reference solver (worst case)",
+                  common.time_calls(lambda: compute_min_deadwood_reference(WORST_CASE_HANDS[0]), 20))
+    common.report("bitmask solver (worst case, cold)",
+                  common.time_calls(lambda: (solve_mask.cache_clear(),
+                                             compute_min_deadwood(WORST_CASE_HANDS[0])), 20))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
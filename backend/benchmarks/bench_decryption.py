@@ -0,0 +1,39 @@
+"""
+Benchmark of ElGamal card decryption before and after reducing the private
+exponent: c1^(x1*x2) followed by a modular inverse, against a single
+c1^(-(x1*x2) mod (p-1)).
+
+Usage (from the backend folder):
+    python benchmarks/bench_decryption.py [iterations]
+"""
+import sys
+import common
+from Crypto.Util.number import inverse
+from encryption import CardEncryption
+
+def decrypt_card_unreduced(public_key, encrypted_card, private_keys):
+    """
+    Reference decryption with the full ~512-bit exponent and a separate inverse.
+    """
+    p = public_key[0]
+    c1, c2 = encrypted_card
+    x1, x2 = private_keys
+    s = pow(c1, x1 * x2, p)
+    return (c2 * inverse(s, p)) % p
+
+def main(iterations=500):
+    public_key, private_keys = CardEncryption.generate_keys()
+    crypto = CardEncryption(public_key)
+    cards = crypto.encrypt_cards(range(1, 53))
+    for value, card in zip(range(1, 53), cards):
+        assert crypto.decrypt_card(card, private_keys) == value
+        assert decrypt_card_unreduced(public_key, card, private_keys) == value
+
+    card = cards[0]
+    common.report("decrypt_card (x1*x2 + inverse)",
+                  common.time_calls(lambda: decrypt_card_unreduced(public_key, card, private_keys), iterations))
+    common.report("decrypt_card (reduced exponent)",
+                  common.time_calls(lambda: crypto.decrypt_card(card, private_keys), iterations))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
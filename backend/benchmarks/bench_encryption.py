@@ -0,0 +1,40 @@
+"""
+Microbenchmark for ElGamal card encryption: plain pow() against the
+fixed-base tables, per card and for a full 52-card deck.
+
+Usage (from the backend folder):
+    python benchmarks/bench_encryption.py [iterations]
+"""
+import random
+import sys
+import common
+from encryption import CardEncryption, FixedBaseTable
+
+def encrypt_card_pow(public_key, card_value):
+    """
+    Reference encryption with two full pow() calls (the pre-table implementation).
+    """
+    p, g, y = public_key
+    k = random.randint(1, p - 2)
+    return pow(g, k, p), (card_value * pow(y, k, p)) % p
+
+def main(iterations=200):
+    public_key, _ = CardEncryption.generate_keys()
+    p, g, y = public_key
+    encryptor = CardEncryption(public_key)
+    deck = list(range(1, 53))
+
+    common.report("table build (g and y)",
+                  common.time_calls(lambda: (FixedBaseTable(g, p, p.bit_length()),
+                                             FixedBaseTable(y, p, p.bit_length())), iterations // 10 or 1))
+    encryptor.fixed_base_tables()  # Build the tables first so the per-card numbers exclude the build
+
+    common.report("encrypt_card (pow)", common.time_calls(lambda: encrypt_card_pow(public_key, 7), iterations))
+    common.report("encrypt_card (fixed-base)", common.time_calls(lambda: encryptor.encrypt_card(7), iterations))
+    common.report("52-card deck (pow)",
+                  common.time_calls(lambda: [encrypt_card_pow(public_key, c) for c in deck], iterations // 10 or 1))
+    common.report("52-card deck (encrypt_cards)",
+                  common.time_calls(lambda: encryptor.encrypt_cards(deck), iterations // 10 or 1))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,29 @@
+"""
+Compares Game() construction latency with a cold prime search against a
+pre-filled KeyPool.
+
+Usage (from the backend folder):
+    python benchmarks/bench_game_creation.py [iterations]
+"""
+import sys
+import common
+from encryption import CardEncryption
+from game import Game
+from keypool import KeyPool
+
+def main(iterations=50):
+    # Key generation alone isolates the part the pool removes
+    common.report("generate_keys (cold)", common.time_calls(CardEncryption.generate_keys, iterations))
+
+    pool = KeyPool(path=None, target_size=iterations)
+    pool.fill()
+    common.report("generate_keys (pooled)",
+                  common.time_calls(lambda: CardEncryption.generate_keys(pool.take()), iterations))
+
+    common.report("Game() (cold)", common.time_calls(Game, iterations))
+
+    pool.fill()
+    common.report("Game() (pooled)", common.time_calls(lambda: Game(key_pool=pool), iterations))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
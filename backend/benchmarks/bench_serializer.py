@@ -0,0 +1,87 @@
+"""
+Benchmark of state emits per second with many spectators at one table: the
+public view built and JSON-encoded by hand for every recipient (as app.py did
+before serializer.py) against the per-version cached encoding.
+
+Each move bumps the game version once and then sends the public view to every
+spectator individually, the way join/resync replies and per-client payloads are
+sent. Spectators are Socket.IO test clients placed in the table room.
+
+Usage (from the backend folder):
+    python benchmarks/bench_serializer.py [moves]
+"""
+import sys
+import time
+import common
+import serializer
+from app import app, socketio, registry, game_store, table_room
+
+SPECTATOR_COUNTS = (10, 100, 500)
+
+def public_state_by_hand(game):
+    """
+    The public dict as the handlers used to build it for every recipient.
+    """
+    return {
+        "deck_size": len(game.deck),
+        "turn": game.turn,
+        "pending": game.pending,
+        "discard_string": game.discard_string,
+        "scores": game.scores
+    }
+
+def connect_spectators(table_id, count):
+    """
+    Connects count test clients and puts each of them in the table room.
+    Returns (clients, sids).
+    """
+    clients, sids = [], []
+    for _ in range(count):
+        client = socketio.test_client(app)
+        sid = socketio.server.manager.sid_from_eio_sid(client.eio_sid, "/")
+        socketio.server.enter_room(sid, table_room(table_id))
+        clients.append(client)
+        sids.append(sid)
+    return clients, sids
+
+def emits_per_second(game, clients, sids, build_payload, moves):
+    """
+    Runs moves state changes, each followed by one emit per spectator, and
+    returns the emit rate.
+    """
+    emits = 0
+    start = time.perf_counter()
+    for _ in range(moves):
+        game.version += 1
+        for sid in sids:
+            socketio.emit("update_game", build_payload(game), to=sid)
+            emits += 1
+        for client in clients:
+            client.get_received()
+    return emits / (time.perf_counter() - start)
+
+def main(moves=50):
+    for count in SPECTATOR_COUNTS:
+        table_id = f"bench-{count}"
+        game = registry.get(table_id)
+        clients, sids = connect_spectators(table_id, count)
+
+        # Both encodings must deliver the same view
+        socketio.emit("update_game", serializer.encode_public_view(game), to=sids[0])
+        cached = clients[0].get_received()[0]["args"][0]
+        assert cached == public_state_by_hand(game)
+
+        by_hand = emits_per_second(game, clients, sids, public_state_by_hand, moves)
+        cached = emits_per_second(game, clients, sids, serializer.encode_public_view, moves)
+        print(f"{count:>4} spectators: by hand {by_hand:10.0f} emits/s   "
+              f"cached per version {cached:10.0f} emits/s   x{cached / by_hand:.2f}")
+
+        for client in clients:
+            client.disconnect()
+        # Leave nothing behind in the server's game store
+        registry.remove(table_id)
+        game_store.delete(table_id)
+    game_store.flush()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
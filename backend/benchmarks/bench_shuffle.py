@@ -0,0 +1,88 @@
+"""
+Commitment cost per format (v1 string vs v2 binary), latency of the full
+two-party shuffle with inline vs batched process-pool verification, and
+throughput of run_party_process with several games shuffling at the same time,
+comparing the SHAKE-256 shuffle engine against the previous implementation that
+reseeded the process-global Mersenne Twister in every round.
+
+The legacy version is not thread-safe: another thread can reseed the global RNG
+between random.seed() and random.shuffle(), which makes honest rounds fail
+verification. The failure count is reported next to the throughput.
+
+Usage (from the backend folder):
+    python benchmarks/bench_shuffle.py [games] [threads]
+"""
+import hashlib
+import random
+import secrets
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import common
+from zkp import (COMMITMENT_V1, COMMITMENT_V2, commit_permutation, create_verification_pool,
+                 run_party_process, run_two_party_shuffle, seeded_shuffle)
+
+def legacy_shuffle(deck, seed):
+    shuffled = list(deck)
+    random.seed(seed)
+    random.shuffle(shuffled)
+    return shuffled
+
+def legacy_party_process(original_deck, rounds=100):
+    """
+    Previous run_party_process: global random.seed() per shuffle, str(list) commitments.
+    """
+    deck = list(original_deck)
+    for _ in range(rounds):
+        seed1, seed2 = secrets.randbits(32), secrets.randbits(32)
+        perm1 = legacy_shuffle(deck, seed1)
+        commitment1 = hashlib.sha256((str(perm1) + str(seed1)).encode()).hexdigest()
+        perm2 = legacy_shuffle(perm1, seed2)
+        commitment2 = hashlib.sha256((str(perm2) + str(seed2)).encode()).hexdigest()
+        if secrets.randbelow(2) == 0:
+            expected = legacy_shuffle(deck, seed1)
+            ok = expected == perm1 and hashlib.sha256((str(expected) + str(seed1)).encode()).hexdigest() == commitment1
+            deck = perm1
+        else:
+            expected = legacy_shuffle(perm1, seed2)
+            ok = expected == perm2 and hashlib.sha256((str(expected) + str(seed2)).encode()).hexdigest() == commitment2
+            deck = perm2
+        if not ok:
+            return None, False
+    return deck, True
+
+def run_concurrently(process, games, threads):
+    """
+    Runs process(deck, rounds=100) for games decks on a thread pool.
+    Returns (elapsed seconds, number of failed processes).
+    """
+    deck = list(range(1, 53))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda _: process(deck, rounds=100), range(games)))
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(1 for _, ok in results if not ok)
+
+def main(games=40, threads=8):
+    perm = seeded_shuffle(bytes(range(1, 53)), 1)
+    seed = secrets.randbits(128)
+    for name, version in (("commitment v1 (str)", COMMITMENT_V1), ("commitment v2 (bytes)", COMMITMENT_V2)):
+        common.report(name, common.time_calls(lambda: commit_permutation(perm, seed, version), 5000))
+
+    deck = list(range(1, 53))
+    common.report("two-party shuffle (inline verify)", common.time_calls(lambda: run_two_party_shuffle(deck), 20))
+    pool = create_verification_pool(max(2, threads))
+    run_two_party_shuffle(deck, executor=pool)  # Start the worker processes before timing
+    common.report(f"two-party shuffle (batched, {max(2, threads)} procs)",
+                  common.time_calls(lambda: run_two_party_shuffle(deck, executor=pool), 20))
+    pool.shutdown()
+
+    sys.setswitchinterval(1e-5)  # Switch threads often, like a busy server would
+    for name, process in (("legacy global RNG", legacy_party_process), ("shake-256 engine", run_party_process)):
+        for workers in (1, threads):
+            elapsed, failures = run_concurrently(process, games, workers)
+            print(f"{name:<20} threads={workers:<3} {games / elapsed:8.1f} party processes/s  "
+                  f"failed={failures}/{games}")
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
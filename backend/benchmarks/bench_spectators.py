@@ -0,0 +1,47 @@
+"""
+Benchmark of the spectator fan-out: how long one public table event takes to
+reach every spectator of a table, for growing numbers of spectators. Every
+event is encoded once and sent with a single room emit.
+
+Spectators are Socket.IO test clients, which decode each packet they receive,
+so the numbers include client-side decoding as well.
+
+Usage (from the backend folder):
+    python benchmarks/bench_spectators.py [events]
+"""
+import sys
+import common
+from app import app, socketio, registry, game_store, spectators
+
+SPECTATOR_COUNTS = (100, 1000, 3000)
+
+def main(events=20):
+    for count in SPECTATOR_COUNTS:
+        table_id = f"bench-spectators-{count}"
+        game = registry.get(table_id)
+        clients = []
+        for _ in range(count):
+            client = socketio.test_client(app)
+            client.emit("spectate", {"table": table_id})
+            client.get_received()
+            clients.append(client)
+
+        def publish():
+            game.version += 1
+            spectators.publish(table_id, game, "draw", player="player1", source="stock")
+
+        samples = common.time_calls(publish, events)
+        received = clients[-1].get_received()
+        assert len(received) == events and "hand" not in received[0]["args"][0]["state"]
+        stats = common.report(f"publish to {count} spectators", samples)
+        print(f"{'':<40} {count * 1000 / stats['mean_ms']:10.0f} deliveries/s")
+
+        for client in clients:
+            client.disconnect()
+        # Leave nothing behind in the server's game store
+        registry.remove(table_id)
+        game_store.delete(table_id)
+    game_store.flush()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+# Benchmarks import the backend modules the same way app.py does
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+def percentile(samples, q):
+    """
+    Returns the q-th percentile (0-100) of a list of samples using nearest-rank.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+def time_calls(fn, iterations):
+    """
+    Calls fn() iterations times and returns the list of wall-clock durations in seconds.
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def summarize(samples):
+    """
+    Summarizes timing samples as milliseconds (mean, p50, p99).
+    """
+    return {
+        "n": len(samples),
+        "mean_ms": 1000 * sum(samples) / len(samples),
+        "p50_ms": 1000 * percentile(samples, 50),
+        "p99_ms": 1000 * percentile(samples, 99),
+    }
+
+def report(name, samples):
+    """
+    Prints a one-line summary of timing samples and returns the summary dict.
+    """
+    stats = summarize(samples)
+    print(f"{name:<40} n={stats['n']:<5} mean={stats['mean_ms']:8.3f} ms  "
+          f"p50={stats['p50_ms']:8.3f} ms  p99={stats['p99_ms']:8.3f} ms")
+    return stats
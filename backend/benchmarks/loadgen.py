@@ -0,0 +1,314 @@
+"""
+Load generator for capacity planning: seats N simulated player pairs, each at
+its own table, and has them play through the same Socket.IO events as the
+browser (join_game, draw_card, discard_card, knock, new_round, new_game), with
+a think time between actions. Reports moves per second, latency percentiles
+per event and error rates.
+
+Every pair runs on its own thread. The player on turn draws from the stock,
+discards their first card and knocks once their deadwood allows it; when the
+stock runs out, or a round or game ends, player1 deals the next one.
+
+Transports:
+    inprocess   Flask-SocketIO test clients against app.py in this process
+                (handler time only, no network)
+    socket      socketio.Client connections to a running server, e.g. one
+                started with "python app.py". Requires the Socket.IO client extras:
+                    pip install "python-socketio[client]"
+
+Usage (from the backend folder):
+    python benchmarks/loadgen.py [--transport inprocess|socket] [--url http://localhost:5000]
+                                 [--pairs 4] [--duration 30] [--think 0.5] [--output load.json]
+
+A think time of t waits a random time between 0 and 2t (t on average)
+before each action; 0 sends as fast as the server answers.
+"""
+import argparse
+import json
+import queue
+import random
+import threading
+import time
+import common
+from bench_cluster import deal_answer, draw_answer
+
+DEFAULT_URL = "http://localhost:5000"
+ANSWER_TIMEOUT = 30
+KNOCK_LIMIT = 10  # Same as game.KNOCK_LIMIT; the client only sees its deadwood
+TABLE_PREFIX = "loadgen"
+EVENTS = ("join_game", "draw_card", "discard_card", "knock", "new_round", "new_game")
+MOVES = ("draw_card", "discard_card", "knock")  # Events counted as moves
+ANSWER_EVENTS = ("update_game", "round_over", "game_over", "knock_error", "wrong_worker")
+
+class NoAnswer(Exception):
+    """
+    Raised when the server sent no acceptable answer to a request in time.
+    """
+
+class InProcessPair:
+    def __init__(self, app, table_id):
+        """
+        Two Flask-SocketIO test clients at one table of the app module's server.
+        Handlers run in the calling thread, so each answer has arrived by the
+        time emit returns.
+        """
+        self.table_id = table_id
+        self.clients = {player: app.socketio.test_client(app.app) for player in ("player1", "player2")}
+
+    def request(self, player, event, payload, accept=None):
+        """
+        Emits an event for a player and returns the first answer accept(event, data)
+        approves of (any answer if accept is None) as (answer event, data).
+        """
+        client = self.clients[player]
+        client.get_received()
+        client.emit(event, dict(payload, table=self.table_id))
+        for packet in client.get_received():
+            answer = (packet["name"], packet["args"][0] if packet["args"] else None)
+            if answer[0] in ANSWER_EVENTS and (accept is None or accept(*answer)):
+                return answer
+        raise NoAnswer(event)
+
+    def close(self):
+        for client in self.clients.values():
+            client.disconnect()
+
+class SocketPair:
+    def __init__(self, url, table_id):
+        """
+        Two socketio.Client connections at one table of the server at url;
+        answers to each player's actions are collected in that player's queue.
+        """
+        import socketio  # Only the socket transport needs the client extras
+        self.table_id = table_id
+        self.answers = {}
+        self.clients = {}
+        for player in ("player1", "player2"):
+            answers = queue.Queue()
+            client = socketio.Client()
+            for event in ANSWER_EVENTS:
+                client.on(event, lambda data, event=event, answers=answers: answers.put((event, data)))
+            client.connect(url, transports=["websocket"])
+            self.answers[player] = answers
+            self.clients[player] = client
+
+    def request(self, player, event, payload, accept=None):
+        """
+        Emits an event for a player and waits for that player's next answer
+        accept(event, data) approves of (any answer if accept is None).
+        Returns (answer event, data).
+        """
+        answers = self.answers[player]
+        while not answers.empty():
+            answers.get_nowait()
+        self.clients[player].emit(event, dict(payload, table=self.table_id))
+        deadline = time.monotonic() + ANSWER_TIMEOUT
+        while True:
+            try:
+                answer = answers.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise NoAnswer(event)
+            if accept is None or accept(*answer):
+                return answer
+
+    def close(self):
+        for client in self.clients.values():
+            client.disconnect()
+
+def any_of(*events):
+    """
+    Returns an accept function for the first answer named one of events.
+    """
+    return lambda event, data: event in events
+
+class Stats:
+    def __init__(self):
+        """
+        Latencies, request counts and error counts per event, shared by all pairs.
+        """
+        self.lock = threading.Lock()
+        self.latencies = {event: [] for event in EVENTS}
+        self.errors = {event: 0 for event in EVENTS}
+
+    def record(self, event, seconds, error=False):
+        with self.lock:
+            self.latencies[event].append(seconds)
+            self.errors[event] += error
+
+    def summary(self, duration):
+        """
+        Returns moves per second, the overall error rate and, per event, the
+        request count, error rate and latency percentiles in milliseconds.
+        """
+        with self.lock:
+            events = {}
+            for event, samples in self.latencies.items():
+                if not samples:
+                    continue
+                events[event] = {
+                    "requests": len(samples),
+                    "errors": self.errors[event],
+                    "error_rate": self.errors[event] / len(samples),
+                    "p50_ms": 1000 * common.percentile(samples, 50),
+                    "p95_ms": 1000 * common.percentile(samples, 95),
+                    "p99_ms": 1000 * common.percentile(samples, 99)
+                }
+            requests = sum(len(samples) for samples in self.latencies.values())
+            moves = sum(len(self.latencies[event]) - self.errors[event] for event in MOVES)
+            return {
+                "moves": moves,
+                "moves_per_second": moves / duration,
+                "requests": requests,
+                "error_rate": sum(self.errors.values()) / requests if requests else 0.0,
+                "events": events
+            }
+
+class SimulatedPair:
+    def __init__(self, connection, stats, think):
+        """
+        Plays one table through connection (an InProcessPair or SocketPair),
+        recording every request in stats.
+        """
+        self.connection = connection
+        self.stats = stats
+        self.think = think
+
+    def request(self, player, event, payload, accept=None, ok=None):
+        """
+        Waits the think time, then sends one request and records its latency.
+        The request counts as an error if no answer came or ok(event, data)
+        rejects the answer. Returns the answer, or None on error.
+        """
+        if self.think:
+            time.sleep(random.uniform(0, 2 * self.think))
+        start = time.perf_counter()
+        try:
+            answer = self.connection.request(player, event, dict(payload, player=player), accept)
+        except NoAnswer:
+            self.stats.record(event, time.perf_counter() - start, error=True)
+            return None
+        elapsed = time.perf_counter() - start
+        failed = ok is not None and not ok(*answer)
+        self.stats.record(event, elapsed, error=failed)
+        return None if failed else answer
+
+    def deal(self, event="new_round"):
+        """
+        Has player1 deal a new round (or game) and returns whose turn it is,
+        or None if the deal went unanswered.
+        """
+        message = "New round started" if event == "new_round" else "A new game has started!"
+        answer = self.request("player1", event, {}, deal_answer(message))
+        return answer[1]["turn"] if answer else None
+
+    def play(self, deadline):
+        """
+        Plays until deadline (a time.monotonic() value).
+        """
+        turn = None
+        for player in ("player1", "player2"):
+            answer = self.request(player, "join_game", {}, any_of("update_game", "wrong_worker"),
+                                  ok=lambda event, data: event == "update_game")
+            if answer is None:
+                return  # Not served here (e.g. another cluster worker owns the table)
+            turn = answer[1]["turn"]
+
+        while time.monotonic() < deadline:
+            if turn is None:
+                turn = self.deal()
+                continue
+            player = turn
+            stock_empty = []
+
+            def drawn(event, data):
+                if event == "update_game" and "No cards left" in str(data.get("message", "")):
+                    stock_empty.append(True)  # Expected at the end of a round, not an error
+                    return True
+                return event == "update_game" and data.get("pending") == player
+            answer = self.request(player, "draw_card", {"source": "stock"}, draw_answer(player), ok=drawn)
+            if answer is None or stock_empty:
+                turn = self.deal() if stock_empty else None
+                continue
+
+            answer = self.request(player, "discard_card", {"cardIndex": 0},
+                                  ok=lambda event, data: event != "update_game" or data.get("turn") != player)
+            if answer is None:
+                turn = None
+                continue
+            event, data = answer
+            if event in ("round_over", "game_over"):
+                # Gin: the discard ended the round
+                turn = self.deal("new_game" if event == "game_over" else "new_round")
+                continue
+
+            if data.get("deadwood", KNOCK_LIMIT + 1) <= KNOCK_LIMIT:
+                answer = self.request(player, "knock", {}, any_of("round_over", "game_over", "knock_error"),
+                                      ok=any_of("round_over", "game_over"))
+                turn = self.deal("new_game" if answer and answer[0] == "game_over" else "new_round")
+            else:
+                turn = data["turn"]
+
+def run(connect, pairs, duration, think):
+    """
+    Plays pairs tables at once for duration seconds. connect(table_id)
+    returns the connection of one pair. Returns the summary of Stats.
+    """
+    stats = Stats()
+    connections = [connect(f"{TABLE_PREFIX}-{index}") for index in range(pairs)]
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=SimulatedPair(connection, stats, think).play, args=(deadline,))
+               for connection in connections]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start  # Includes the moves still in flight at the deadline
+    for connection in connections:
+        connection.close()
+    return stats.summary(elapsed)
+
+def run_in_process(pairs, duration, think):
+    import app  # Starts the server's executors in this process
+    try:
+        return run(lambda table_id: InProcessPair(app, table_id), pairs, duration, think)
+    finally:
+        # Leave nothing behind in the server's game store
+        for index in range(pairs):
+            table_id = f"{TABLE_PREFIX}-{index}"
+            app.registry.remove(table_id)
+            app.game_store.delete(table_id)
+        app.game_store.flush()
+
+def run_over_socket(url, pairs, duration, think):
+    return run(lambda table_id: SocketPair(url, table_id), pairs, duration, think)
+
+def report(summary):
+    for event, stats in summary["events"].items():
+        print(f"{event:<14} n={stats['requests']:<6} errors={stats['errors']:<4} ({stats['error_rate']:6.2%})  "
+              f"p50={stats['p50_ms']:8.2f} ms  p95={stats['p95_ms']:8.2f} ms  p99={stats['p99_ms']:8.2f} ms")
+    print(f"{summary['moves']} moves, {summary['moves_per_second']:.1f} moves/s, "
+          f"{summary['requests']} requests, error rate {summary['error_rate']:.2%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive simulated player pairs through the Socket.IO events.")
+    parser.add_argument("--transport", choices=("inprocess", "socket"), default="inprocess",
+                        help="test clients in this process, or real connections to --url")
+    parser.add_argument("--url", default=DEFAULT_URL, help="server to connect to with --transport socket")
+    parser.add_argument("--pairs", type=int, default=4, help="simulated player pairs, one table each")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to play")
+    parser.add_argument("--think", type=float, default=0.5, help="mean think time before each action, in seconds")
+    parser.add_argument("--output", help="JSON file the summary is also written to")
+    args = parser.parse_args()
+
+    if args.transport == "inprocess":
+        summary = run_in_process(args.pairs, args.duration, args.think)
+    else:
+        summary = run_over_socket(args.url, args.pairs, args.duration, args.think)
+    report(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(summary, transport=args.transport, pairs=args.pairs, think=args.think), f, indent=2)
+
+if __name__ == "__main__":
+    main()
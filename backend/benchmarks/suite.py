@@ -0,0 +1,204 @@
+"""
+Benchmark suite for regression tracking: times the crypto, shuffle-proof,
+deadwood-solver, game-setup and full-round paths and saves the results as
+JSON, optionally comparing them with an earlier run.
+
+Cases:
+    keygen_cold, keygen_pooled     CardEncryption.generate_keys with and without a prime search
+    encrypt_card, decrypt_card     one card with a warm key
+    run_party_process_100          run_party_process(deck, rounds=100)
+    deadwood_worst_case            compute_min_deadwood on worst-case hands, solver cache cleared
+    game_construction              Game() with a pre-filled KeyPool
+    full_round, full_round_event   a scripted round through the Socket.IO test client
+                                   (whole round, and each draw/discard/knock event)
+
+Usage (from the backend folder):
+    python benchmarks/suite.py [--quick] [--output results.json] [--compare baseline.json] [--threshold 0.25]
+
+With --compare, cases whose p50 grew by more than the threshold are listed
+and the exit status is 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import common
+from bench_deadwood import WORST_CASE_HANDS
+from encryption import CardEncryption
+from game import Game, compute_min_deadwood
+from keypool import KeyPool
+from melds import arrange_mask, solve_mask
+from zkp import run_party_process
+
+DEFAULT_OUTPUT = os.path.join(common.BACKEND_DIR, "benchmarks", "results.json")
+DEFAULT_THRESHOLD = 0.25  # Relative p50 slowdown reported as a regression
+SUITE_TABLE = "bench-suite"
+
+# Iterations per case: (full run, --quick)
+ITERATIONS = {
+    "keygen_cold": (50, 10),
+    "keygen_pooled": (500, 50),
+    "encrypt_card": (2000, 200),
+    "decrypt_card": (2000, 200),
+    "run_party_process_100": (30, 5),
+    "deadwood_worst_case": (200, 20),
+    "game_construction": (30, 5),
+    "full_round": (20, 3),
+}
+
+def iterations(case, quick):
+    return ITERATIONS[case][1 if quick else 0]
+
+def bench_crypto(results, quick):
+    random.seed(2024)
+    results["keygen_cold"] = common.summarize(
+        common.time_calls(CardEncryption.generate_keys, iterations("keygen_cold", quick)))
+
+    pool = KeyPool(path=None, target_size=iterations("keygen_pooled", quick))
+    pool.fill()
+    results["keygen_pooled"] = common.summarize(
+        common.time_calls(lambda: CardEncryption.generate_keys(pool.take()), iterations("keygen_pooled", quick)))
+
+    public_key, private_keys = CardEncryption.generate_keys()
+    encryption = CardEncryption(public_key)
+    encryption.fixed_base_tables()  # Per-key table build is part of game setup, not of a card
+    ciphertext = encryption.encrypt_card(7)
+    results["encrypt_card"] = common.summarize(
+        common.time_calls(lambda: encryption.encrypt_card(7), iterations("encrypt_card", quick)))
+    results["decrypt_card"] = common.summarize(
+        common.time_calls(lambda: encryption.decrypt_card(ciphertext, private_keys),
+                          iterations("decrypt_card", quick)))
+
+def bench_shuffle(results, quick):
+    deck = list(range(1, 53))
+    results["run_party_process_100"] = common.summarize(
+        common.time_calls(lambda: run_party_process(deck, rounds=100), iterations("run_party_process_100", quick)))
+
+def bench_deadwood(results, quick):
+    def solve_worst_cases():
+        # Clear the memo so every call pays for the full search
+        solve_mask.cache_clear()
+        arrange_mask.cache_clear()
+        for hand in WORST_CASE_HANDS:
+            compute_min_deadwood(hand)
+    results["deadwood_worst_case"] = common.summarize(
+        common.time_calls(solve_worst_cases, iterations("deadwood_worst_case", quick)))
+
+def bench_game(results, quick):
+    count = iterations("game_construction", quick)
+    pool = KeyPool(path=None, target_size=count)
+    pool.fill()
+    results["game_construction"] = common.summarize(common.time_calls(lambda: Game(key_pool=pool), count))
+
+def play_round(app, clients, event_samples):
+    """
+    Deals a new round on the suite table and plays it through the test client:
+    the player on turn draws from the stock and discards their first card, and
+    knocks as soon as their deadwood allows it. Stops at the knock (or gin),
+    or when the stock runs out.
+    """
+    clients["player1"].emit("new_round", {"table": SUITE_TABLE})
+    game = app.registry.get(SUITE_TABLE)
+    while True:
+        player = game.turn
+        client = clients[player]
+        for event, payload in (("draw_card", {"source": "stock"}), ("discard_card", {"cardIndex": 0})):
+            start = time.perf_counter()
+            client.emit(event, dict(payload, player=player, table=SUITE_TABLE))
+            event_samples.append(time.perf_counter() - start)
+        if game.turn == player:
+            return  # The draw failed: the stock is empty
+        deadwood = game.players[player].deadwood
+        if deadwood == 0:
+            return  # Gin: the server already ended the round
+        if deadwood <= 10:
+            start = time.perf_counter()
+            client.emit("knock", {"player": player, "table": SUITE_TABLE})
+            event_samples.append(time.perf_counter() - start)
+            return
+        for other in clients.values():
+            other.get_received()
+
+def bench_full_round(results, quick):
+    import app  # Starts the server's executors; only needed for this case
+    clients = {player: app.socketio.test_client(app.app) for player in ("player1", "player2")}
+    for player, client in clients.items():
+        client.emit("join_game", {"player": player, "table": SUITE_TABLE})
+    event_samples = []
+    results["full_round"] = common.summarize(
+        common.time_calls(lambda: play_round(app, clients, event_samples), iterations("full_round", quick)))
+    results["full_round_event"] = common.summarize(event_samples)
+    for client in clients.values():
+        client.disconnect()
+    # Leave nothing behind in the server's game store
+    app.registry.remove(SUITE_TABLE)
+    app.game_store.delete(SUITE_TABLE)
+    app.game_store.flush()
+
+def environment():
+    """
+    Describes where the results were measured, so runs can be compared fairly.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=common.BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+def compare(results, baseline, threshold):
+    """
+    Prints the p50 change of every case present in both runs and returns the
+    names of the cases that slowed down by more than threshold.
+    """
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get("cases", {}).get(name)
+        if not before or not before["p50_ms"]:
+            continue
+        change = stats["p50_ms"] / before["p50_ms"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<28} p50 {before['p50_ms']:10.3f} -> {stats['p50_ms']:10.3f} ms ({change:+.1%}){flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and save the results as JSON.")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke run")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON file the results are written to")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative p50 slowdown reported as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    for bench in (bench_crypto, bench_shuffle, bench_deadwood, bench_game, bench_full_round):
+        bench(results, args.quick)
+    for name, stats in results.items():
+        print(f"{name:<28} n={stats['n']:<5} mean={stats['mean_ms']:9.3f} ms  "
+              f"p50={stats['p50_ms']:9.3f} ms  p99={stats['p99_ms']:9.3f} ms")
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "quick": args.quick, "cases": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+from cards import CARD_STRINGS
+from protocol import PROTOCOL_VERSION
+
+try:
+    import msgpack
+except ImportError:  # The binary transport is optional; without msgpack every client gets JSON
+    msgpack = None
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+
+# Envelope types
+SNAPSHOT = 0
+DELTA = 1
+
+# Field codes are the positions in this tuple; "hand" only appears in snapshots
+FIELDS = ("deck_size", "turn", "pending", "deadwood", "opponent_count", "discard_string", "scores", "hand")
+FIELD_CODES = {field: code for code, field in enumerate(FIELDS)}
+
+# Hand operation codes, same order as in protocol.hand_ops' documentation
+OPS = ("remove", "add", "move")
+OP_CODES = {op: code for code, op in enumerate(OPS)}
+
+# Player names travel as 1 or 2 (0 for None)
+PLAYERS = (None, "player1", "player2")
+PLAYER_CODES = {player: code for code, player in enumerate(PLAYERS)}
+
+# Card strings travel as their card id (1-52), one byte each
+CARD_IDS = {string: value for value, string in enumerate(CARD_STRINGS) if string}
+
+def negotiate(requested):
+    """
+    Returns the encoding to use for a client that asked for requested:
+    msgpack when it was asked for and is available, JSON otherwise.
+    """
+    if requested == ENCODING_MSGPACK and msgpack is not None:
+        return ENCODING_MSGPACK
+    return ENCODING_JSON
+
+def _encode_field(field, value):
+    """
+    Converts one view field to its compact form.
+    """
+    if field == "hand":
+        return bytes(CARD_IDS[card] for card in value)
+    if field == "discard_string":
+        return CARD_IDS.get(value, 0)
+    if field in ("turn", "pending"):
+        return PLAYER_CODES.get(value, 0)
+    if field == "scores":
+        return [value.get("player1", 0), value.get("player2", 0)]
+    return value
+
+def _encode_fields(fields):
+    return {FIELD_CODES[field]: _encode_field(field, value) for field, value in fields.items() if field in FIELD_CODES}
+
+def _encode_op(op):
+    if op[0] == "add":
+        return [OP_CODES["add"], op[1], CARD_IDS[op[2]]]
+    return [OP_CODES[op[0]]] + op[1:]
+
+def pack(payload):
+    """
+    Encodes a state_snapshot or state_delta payload (see protocol.StateStream)
+    as a msgpack envelope:
+
+        [version, SNAPSHOT, seq, {field code: value}, message]
+        [version, DELTA, seq, {field code: value}, [[op code, ...], ...], message]
+
+    Cards are single-byte ids: the hand is a byte string and hand operations
+    carry the id. Players are 1/2 and scores are [player1, player2].
+    """
+    if "state" in payload:
+        state = payload["state"]
+        envelope = [PROTOCOL_VERSION, SNAPSHOT, payload["seq"], _encode_fields(state), state.get("message")]
+    else:
+        ops = [_encode_op(op) for op in payload.get("hand", [])]
+        envelope = [PROTOCOL_VERSION, DELTA, payload["seq"], _encode_fields(payload["changes"]), ops,
+                    payload.get("message")]
+    return msgpack.packb(envelope)
+
+def unpack(data):
+    """
+    Decodes an envelope produced by pack back into the JSON payload shape.
+    The frontend does the same in binaryProtocol.js.
+    """
+    envelope = msgpack.unpackb(data, strict_map_key=False)
+    kind, seq, fields = envelope[1], envelope[2], envelope[3]
+    decoded = {}
+    for code, value in fields.items():
+        field = FIELDS[code]
+        if field == "hand":
+            value = [CARD_STRINGS[card] for card in value]
+        elif field == "discard_string":
+            value = CARD_STRINGS[value] if value else None
+        elif field in ("turn", "pending"):
+            value = PLAYERS[value]
+        elif field == "scores":
+            value = {"player1": value[0], "player2": value[1]}
+        decoded[field] = value
+
+    if kind == SNAPSHOT:
+        if envelope[4]:
+            decoded["message"] = envelope[4]
+        return {"protocol": envelope[0], "seq": seq, "state": decoded}
+    payload = {"protocol": envelope[0], "seq": seq, "changes": decoded}
+    if envelope[4]:
+        payload["hand"] = [[OPS[op[0]]] + ([op[1], CARD_STRINGS[op[2]]] if OPS[op[0]] == "add" else op[1:])
+                           for op in envelope[4]]
+    if envelope[5]:
+        payload["message"] = envelope[5]
+    return payload
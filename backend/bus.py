@@ -0,0 +1,209 @@
+"""
+Local message bus for running several app.py workers on one host without
+Redis: a small broker that relays every frame it receives to every connected
+process over a Unix socket, and a Socket.IO client manager that uses it.
+
+Usage (cluster.py starts the broker itself):
+    python bus.py [unix:///tmp/gin-rummy-bus.sock]
+"""
+import os
+import socket
+import struct
+import sys
+import threading
+import socketio
+
+DEFAULT_BUS_URL = "unix:///tmp/gin-rummy-bus.sock"
+FRAME_HEADER = struct.Struct("!I")  # Every frame is a 4-byte length followed by the payload
+
+def socket_path(url):
+    """
+    Returns the filesystem path of a unix:// bus URL.
+    """
+    if not url.startswith("unix://"):
+        raise ValueError(f"Unsupported bus URL: {url}")
+    return url[len("unix://"):]
+
+def send_frame(sock, payload):
+    sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def recv_frame(sock):
+    """
+    Reads one frame, or returns None when the connection was closed.
+    """
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    return _recv_exact(sock, FRAME_HEADER.unpack(header)[0])
+
+class LocalBroker:
+    def __init__(self, url=DEFAULT_BUS_URL):
+        """
+        Fan-out broker: every frame a connected process sends is relayed to all
+        connected processes (the sender included; Socket.IO managers skip
+        their own messages). Meant for development and tests; use a real
+        message queue such as Redis across hosts.
+        """
+        self.path = socket_path(url)
+        self.clients = set()
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self):
+        """
+        Starts accepting connections on a daemon thread and returns self.
+        """
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        self.server.listen()
+        threading.Thread(target=self._accept, name="bus-accept", daemon=True).start()
+        return self
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return  # Broker stopped
+            with self.lock:
+                self.clients.add(client)
+            threading.Thread(target=self._relay, args=(client,), name="bus-relay", daemon=True).start()
+
+    def _relay(self, client):
+        """
+        Reads frames from one process and forwards them to every process.
+        """
+        while True:
+            try:
+                payload = recv_frame(client)
+            except OSError:
+                payload = None
+            if payload is None:
+                break
+            with self.lock:
+                targets = list(self.clients)
+            for target in targets:
+                try:
+                    send_frame(target, payload)
+                except OSError:
+                    self._drop(target)
+        self._drop(client)
+
+    def _drop(self, client):
+        with self.lock:
+            self.clients.discard(client)
+        client.close()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        with self.lock:
+            clients, self.clients = list(self.clients), set()
+        for client in clients:
+            client.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+class LocalBusManager(socketio.PubSubManager):
+    """
+    Socket.IO client manager that shares emits, room changes and disconnects
+    with the other workers through a LocalBroker, like RedisManager does
+    through Redis.
+    """
+    name = "local"
+
+    def __init__(self, url=DEFAULT_BUS_URL, channel="flask-socketio", write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.path = socket_path(url)
+        self.publisher = None
+        self.publish_lock = None
+
+    def _eventlet(self):
+        return self.server is not None and self.server.async_mode == "eventlet"
+
+    def _socket_module(self):
+        """
+        Returns the socket module matching the server's async mode, so that
+        waiting on the bus never blocks an eventlet hub.
+        """
+        if self._eventlet():
+            from eventlet.green import socket as green_socket
+            return green_socket
+        return socket
+
+    def _create_lock(self):
+        if self._eventlet():
+            from eventlet.semaphore import Semaphore
+            return Semaphore()
+        return threading.Lock()
+
+    def _connect(self):
+        sock = self._socket_module().socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        return sock
+
+    def _publish(self, data):
+        payload = self.json.dumps({"channel": self.channel, "data": data}).encode()
+        if self.publish_lock is None:
+            self.publish_lock = self._create_lock()
+        with self.publish_lock:
+            for attempt in range(2):
+                try:
+                    if self.publisher is None:
+                        self.publisher = self._connect()
+                    send_frame(self.publisher, payload)
+                    return
+                except OSError:
+                    # The broker restarted: reconnect once, then give up on this message
+                    self.publisher = None
+                    if attempt:
+                        raise
+
+    def _listen(self):
+        """
+        Yields the messages published on this channel, reconnecting whenever
+        the broker is not (or no longer) reachable.
+        """
+        while True:
+            try:
+                sock = self._connect()
+            except OSError:
+                self.server.sleep(1)
+                continue
+            while True:
+                try:
+                    payload = recv_frame(sock)
+                except OSError:
+                    payload = None
+                if payload is None:
+                    break
+                message = self.json.loads(payload)
+                if message.get("channel") == self.channel:
+                    yield message["data"]
+            sock.close()
+
+def create_client_manager(url, json=None):
+    """
+    Returns a LocalBusManager for unix:// URLs, or None for any other URL
+    (Flask-SocketIO handles redis://, kafka:// and the like itself).
+    """
+    if url and url.startswith("unix://"):
+        return LocalBusManager(url, json=json)
+    return None
+
+if __name__ == "__main__":
+    broker = LocalBroker(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BUS_URL).start()
+    print(f"[bus] Relaying on {broker.path}")
+    threading.Event().wait()
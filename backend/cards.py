@@ -0,0 +1,16 @@
+# Precomputed per-card lookup tables shared by game.py, player.py and melds.py.
+# Cards are numbered 1..52; every table has 53 entries so it can be indexed by
+# the card value directly (entry 0 is an unused placeholder).
+
+SUITS = ("Hearts", "Diamonds", "Clubs", "Spades")
+RANK_NAMES = (None, "A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K")
+
+# Deadwood points per rank (1-13): ace = 1, face cards = 10, others = rank
+RANK_POINTS = (0,) + tuple(min(rank, 10) for rank in range(1, 14))
+
+CARD_RANKS = (0,) + tuple((value - 1) % 13 + 1 for value in range(1, 53))
+CARD_SUITS = (None,) + tuple((value - 1) // 13 for value in range(1, 53))
+CARD_POINTS = (0,) + tuple(RANK_POINTS[CARD_RANKS[value]] for value in range(1, 53))
+CARD_STRINGS = (None,) + tuple(
+    f"{SUITS[CARD_SUITS[value]]} {RANK_NAMES[CARD_RANKS[value]]}" for value in range(1, 53)
+)
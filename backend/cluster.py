@@ -0,0 +1,132 @@
+"""
+Runs the game server as several worker processes on one host. Tables are
+sharded across the workers by table id, so each table lives in exactly one
+process; clients connect to the worker that owns their table (GET /route, or
+the REACT_APP_WORKERS setting of the frontend). Emits go through a shared
+message queue so a room can span workers.
+
+Usage (from the backend folder):
+    python cluster.py --workers 4 --base-port 5001
+    python cluster.py --workers 4 --message-queue redis://localhost:6379/0
+
+Each worker reads its settings from the environment:
+    GIN_WORKERS        comma-separated URLs of all workers, in shard order
+    GIN_WORKER_INDEX   position of this worker in GIN_WORKERS
+    GIN_MESSAGE_QUEUE  Socket.IO message queue URL (unix:// uses bus.py)
+    GIN_CRYPTO_WORKERS crypto worker processes of this worker (see crypto_executor.py)
+    PORT               port to listen on
+"""
+import argparse
+import os
+import subprocess
+import sys
+import zlib
+from bus import DEFAULT_BUS_URL, LocalBroker
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Settings of this process; without GIN_WORKERS a single process owns every table
+WORKER_URLS = [url for url in os.environ.get("GIN_WORKERS", "").split(",") if url]
+WORKER_INDEX = int(os.environ.get("GIN_WORKER_INDEX", "0"))
+MESSAGE_QUEUE = os.environ.get("GIN_MESSAGE_QUEUE") or None
+
+def shard_for(table_id, worker_count):
+    """
+    Returns the index of the worker that owns a table. CRC-32 is stable across
+    processes and restarts, unlike hash() on strings.
+    """
+    return zlib.crc32(table_id.encode("utf-8")) % worker_count
+
+def owner_url(table_id, worker_urls=None):
+    """
+    Returns the URL of the worker owning a table, or None in single-process mode.
+    """
+    worker_urls = WORKER_URLS if worker_urls is None else worker_urls
+    if not worker_urls:
+        return None
+    return worker_urls[shard_for(table_id, len(worker_urls))]
+
+def worker_path(path):
+    """
+    Returns the file this process should use for path (the key pool or the
+    game store): path itself in single-process mode, otherwise path with the
+    worker index before the extension, so workers never share a file. A worker
+    only stores the tables it owns, so its files stay valid as long as the
+    number of workers does not change.
+    """
+    if not WORKER_URLS:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.worker{WORKER_INDEX}{extension}"
+
+def owns(table_id):
+    """
+    Tells whether this process owns a table.
+    """
+    return not WORKER_URLS or shard_for(table_id, len(WORKER_URLS)) == WORKER_INDEX
+
+def crypto_workers_per_worker(workers):
+    """
+    Returns how many crypto processes each of workers servers gets so that,
+    together, they use one per CPU (at least one each).
+    """
+    return max(1, (os.cpu_count() or 1) // workers)
+
+def start_workers(workers, base_port=5001, host="127.0.0.1", message_queue=DEFAULT_BUS_URL, quiet=False,
+                  crypto_workers=None):
+    """
+    Starts the local broker (for unix:// message queues) and one app.py process
+    per worker, each with crypto_workers crypto processes (by default the CPUs
+    split between the workers, see crypto_workers_per_worker).
+    Returns (broker, processes, worker_urls); broker is None when an
+    external message queue is used.
+    """
+    crypto_workers = crypto_workers or crypto_workers_per_worker(workers)
+    broker = LocalBroker(message_queue).start() if message_queue.startswith("unix://") else None
+    urls = [f"http://{host}:{base_port + index}" for index in range(workers)]
+    processes = []
+    for index in range(workers):
+        env = dict(os.environ, GIN_WORKERS=",".join(urls), GIN_WORKER_INDEX=str(index),
+                   GIN_MESSAGE_QUEUE=message_queue, GIN_CRYPTO_WORKERS=str(crypto_workers),
+                   PORT=str(base_port + index))
+        output = subprocess.DEVNULL if quiet else None
+        processes.append(subprocess.Popen([sys.executable, "app.py"], cwd=BACKEND_DIR, env=env,
+                                          stdout=output, stderr=output))
+    return broker, processes, urls
+
+def stop_workers(broker, processes):
+    """
+    Terminates the worker processes and the local broker.
+    """
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+    if broker is not None:
+        broker.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game server as several worker processes.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--base-port", type=int, default=5001, help="port of the first worker")
+    parser.add_argument("--host", default="127.0.0.1", help="host name the workers are reached at")
+    parser.add_argument("--message-queue", default=DEFAULT_BUS_URL,
+                        help="Socket.IO message queue (unix:// starts the local broker, or redis://...)")
+    parser.add_argument("--crypto-workers", type=int,
+                        help="crypto worker processes per server (default: the CPU count divided by --workers)")
+    args = parser.parse_args()
+
+    broker, processes, urls = start_workers(args.workers, args.base_port, args.host, args.message_queue,
+                                            crypto_workers=args.crypto_workers)
+    print(f"[cluster] Workers: {','.join(urls)}")
+    print(f"[cluster] Frontend: REACT_APP_WORKERS={','.join(urls)}")
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers(broker, processes)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from encryption import CardEncryption
+from metrics import metrics
+from zkp import run_two_party_shuffle
+
+try:
+    from eventlet import tpool
+except ImportError:  # Without eventlet, waiting on a future simply blocks the calling thread
+    tpool = None
+
+# Worker processes per server process: GIN_CRYPTO_WORKERS, or one per CPU.
+# cluster.py sets it so that all of its servers together use one process per CPU.
+DEFAULT_WORKERS = int(os.environ.get("GIN_CRYPTO_WORKERS", "0")) or os.cpu_count() or 1
+
+# Tasks run in the worker processes; they are top-level functions so they can be pickled
+
+def generate_keys(prime=None):
+    """
+    Generates an ElGamal key pair (see CardEncryption.generate_keys), searching
+    for a prime first when none is given.
+    """
+    return CardEncryption.generate_keys(prime)
+
+def shuffle_deck(public_key, cards, rounds):
+    """
+    Runs the two-party secure shuffle of cards, proofs included, and encrypts
+    the deck in its final order.
+    Returns (final order, ciphertexts), or (None, None) if the shuffle failed.
+    """
+    deck_final, shuffle_ok = run_two_party_shuffle(cards, rounds=rounds)
+    if not shuffle_ok:
+        return None, None
+    return deck_final, CardEncryption(public_key).encrypt_cards(deck_final)
+
+def decrypt_cards(public_key, private_keys, encrypted_cards):
+    """
+    Decrypts a batch of cards with one key pair, in order.
+    """
+    encryption = CardEncryption(public_key)
+    return [encryption.decrypt_card(card, private_keys) for card in encrypted_cards]
+
+def _ready():
+    return True
+
+class CryptoExecutor:
+    def __init__(self, workers=None, green=False):
+        """
+        Runs the CPU-bound card cryptography (key generation, secure shuffles,
+        batch decryption) on a pool of worker processes, so it neither blocks
+        the server's event loop nor competes with it for the GIL.
+
+        Args:
+            workers: Number of worker processes (defaults to DEFAULT_WORKERS).
+            green: True when the server runs on eventlet. A green thread of the
+                   server waiting for a result then yields to the other
+                   connections instead of blocking the whole process.
+
+        Waits from any other thread (e.g. the deck pipeline's workers) block
+        only that thread.
+        """
+        self.workers = workers or DEFAULT_WORKERS
+        self.green = green and tpool is not None
+        self.hub_thread = threading.main_thread().ident  # The thread eventlet's green threads run on
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.lock = threading.Lock()
+        self.tasks = {}  # Task name -> {"calls", "total_ms", "last_ms"}
+
+    def start(self):
+        """
+        Starts the worker processes now and returns self. Call it before the
+        server starts other threads, since the workers are forked.
+        """
+        self.pool.submit(_ready).result()
+        return self
+
+    def wait(self, future):
+        """
+        Returns the result of a future from this executor, yielding to other
+        green threads while it is pending when called from the eventlet hub.
+        """
+        if self.green and threading.get_ident() == self.hub_thread:
+            return tpool.execute(future.result)
+        return future.result()
+
+    def run(self, fn, *args):
+        """
+        Runs fn(*args) on a worker process and returns its result (see wait).
+        """
+        start = time.perf_counter()
+        result = self.wait(self.pool.submit(fn, *args))
+        elapsed = time.perf_counter() - start
+        if metrics.enabled:
+            metrics.observe("call", fn.__name__, elapsed)
+        elapsed_ms = 1000 * elapsed
+        with self.lock:
+            stats = self.tasks.setdefault(fn.__name__, {"calls": 0, "total_ms": 0.0, "last_ms": None})
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["last_ms"] = elapsed_ms
+        return result
+
+    # The workers' own metrics are never rendered, so the work done there is counted here
+
+    def generate_keys(self, prime=None):
+        keys = self.run(generate_keys, prime)
+        if prime is None:
+            metrics.count("prime_search", "executor")
+        metrics.count("modexp", "keygen")
+        return keys
+
+    def shuffle_deck(self, public_key, cards, rounds):
+        order, ciphertexts = self.run(shuffle_deck, public_key, list(cards), rounds)
+        if ciphertexts is not None:
+            metrics.count("modexp", "encrypt", 2 * len(ciphertexts))
+        return order, ciphertexts
+
+    def decrypt_cards(self, public_key, private_keys, encrypted_cards):
+        return self.run(decrypt_cards, public_key, private_keys, list(encrypted_cards))
+
+    def stats(self):
+        """
+        Returns the worker count and, per task, how many ran and their mean and
+        last wall-clock time in milliseconds (queueing and transfer included).
+        """
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "green": self.green,
+                "tasks": {name: {"calls": stats["calls"],
+                                 "mean_ms": stats["total_ms"] / stats["calls"],
+                                 "last_ms": stats["last_ms"]}
+                          for name, stats in self.tasks.items()}
+            }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -2,37 +2,93 @@ import random
 from encryption import CardEncryption
 
 class Deck:
-    def __init__(self, public_key):
+    def __init__(self, public_key, encryption=None):
         """
-        Initializes the deck with shuffled cards and encrypts them.
+        Initializes the deck with shuffled cards. Encryption is deferred.
         
         Args:
             public_key: The public key used for encrypting the cards.
+            encryption: CardEncryption for public_key to encrypt with, e.g. the
+                        game's, so every deck of a game shares its fixed-base tables.
             
         Steps:
             1. Creates a list of cards numbered 1 to 52.
             2. Performs an initial shuffle using random.shuffle.
-            3. Initializes the CardEncryption instance with the provided public key.
-            4. Encrypts each card in the shuffled deck.
+            3. Uses the given CardEncryption, or a new one for the provided public key.
             
-        Note: The final secure shuffle (using the ZKP protocol) will be performed in the game reset_round method.
+        Note: The final secure shuffle (using the ZKP protocol) is performed by the game,
+        which then calls set_order. Cards are only encrypted in their final order, either
+        all at once with encrypt_remaining or one at a time as they are drawn.
         """
         self.cards = list(range(1, 53))
         random.shuffle(self.cards)  # Initial simple shuffle
         
         # Initialize the encryption system with the public key.
-        self.encryption = CardEncryption(public_key)
+        self.encryption = encryption or CardEncryption(public_key)
         
-        # Encrypt each card in the deck.
-        self.encrypted_deck = [self.encryption.encrypt_card(card) for card in self.cards]
+        # Ciphertexts produced ahead of time for the first positions of self.cards
+        self.encrypted_deck = []
+        # Position of the next card to draw (the stock is self.cards[self.cursor:])
+        self.cursor = 0
+
+    @classmethod
+    def from_encrypted(cls, public_key, encrypted_cards, pending_cards=(), encryption=None):
+        """
+        Rebuilds a stock saved with stock_state (e.g. from a snapshot): the cards
+        already encrypted, in drawing order, followed by the values of the cards
+        that were still to be encrypted, which are encrypted as they are drawn.
+        """
+        deck = cls(public_key, encryption)
+        deck.cards = [None] * len(encrypted_cards) + list(pending_cards)
+        deck.encrypted_deck = [tuple(card) for card in encrypted_cards]
+        return deck
+
+    def stock_state(self):
+        """
+        Returns the stock in drawing order as (ciphertexts of the cards already
+        encrypted, values of the cards after them). Nothing is encrypted here,
+        so saving a deck keeps per-draw encryption lazy.
+        """
+        pending_start = max(self.cursor, len(self.encrypted_deck))
+        return self.encrypted_deck[self.cursor:], self.cards[pending_start:]
+
+    def set_order(self, cards, encrypted_cards=None):
+        """
+        Replaces the deck order (e.g. with the result of the secure shuffle)
+        and discards any ciphertexts made for the previous order. Ciphertexts
+        already made for the new order (e.g. by the crypto executor) can be
+        passed as encrypted_cards.
+        """
+        self.cards = list(cards)
+        self.encrypted_deck = [tuple(card) for card in encrypted_cards] if encrypted_cards else []
+        self.cursor = 0
+
+    def encrypt_remaining(self):
+        """
+        Encrypts every card that has not been encrypted yet in one batch, so later
+        draws do not pay for encryption (used when decks are prepared in the background).
+        """
+        start = len(self.encrypted_deck)
+        self.encrypted_deck.extend(self.encryption.encrypt_cards(self.cards[start:]))
 
     def draw_card(self):
         """
-        Draws (removes) the top card from the encrypted deck.
+        Draws (removes) the top card from the deck, encrypting it now unless it
+        was encrypted ahead of time.
         
         Returns:
             The encrypted card if available, or None if the deck is empty.
         """
-        if self.encrypted_deck:
-            return self.encrypted_deck.pop(0)
-        return None
+        position = self.cursor
+        if position >= len(self.cards):
+            return None
+        self.cursor += 1
+        if position < len(self.encrypted_deck):
+            return self.encrypted_deck[position]
+        return self.encryption.encrypt_card(self.cards[position])
+
+    def __len__(self):
+        """
+        Returns the number of cards left in the stock.
+        """
+        return len(self.cards) - self.cursor
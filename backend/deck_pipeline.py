@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import deque
+
+class DeckPipeline:
+    def __init__(self, build_deck, depth=1, executor=None):
+        """
+        Keeps fully shuffled, proof-verified and encrypted decks ready for a table,
+        so starting a round only has to take the next one off the queue.
+
+        Args:
+            build_deck: Callable that builds one ready-to-deal Deck.
+            depth: Number of decks to keep ready.
+            executor: concurrent.futures executor the decks are built on. Without one,
+                      take() builds each deck inline (the original behaviour).
+        """
+        self.build_deck = build_deck
+        self.depth = depth
+        self.executor = executor
+        self.ready = deque()
+        self.pending = 0  # Builds submitted to the executor but not finished yet
+        self.lock = threading.Lock()
+        self.refills = 0  # Decks built in the background
+        self.misses = 0  # take() calls that found the queue empty and built inline
+        self.last_refill_seconds = None
+        self.total_refill_seconds = 0.0
+
+    def take(self):
+        """
+        Returns the next ready deck, building one inline if the queue is empty,
+        and schedules a background refill.
+        """
+        with self.lock:
+            deck = self.ready.popleft() if self.ready else None
+            if deck is None:
+                self.misses += 1
+        if deck is None:
+            deck = self.build_deck()
+        self.refill()
+        return deck
+
+    def refill(self):
+        """
+        Submits enough background builds to bring the queue back to its target depth.
+        """
+        if self.executor is None:
+            return
+        with self.lock:
+            missing = max(0, self.depth - len(self.ready) - self.pending)
+            self.pending += missing
+        for _ in range(missing):
+            self.executor.submit(self._build_one)
+
+    def _build_one(self):
+        """
+        Builds one deck on the executor and queues it, recording how long it took.
+        """
+        start = time.perf_counter()
+        try:
+            deck = self.build_deck()
+        except Exception as exc:
+            print(f"[deck_pipeline] Deck build failed: {exc}")
+            with self.lock:
+                self.pending -= 1
+            return
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.pending -= 1
+            self.ready.append(deck)
+            self.refills += 1
+            self.last_refill_seconds = elapsed
+            self.total_refill_seconds += elapsed
+
+    def stats(self):
+        """
+        Returns the queue metrics: current and target depth, builds in flight,
+        refill counts and refill times in milliseconds.
+        """
+        with self.lock:
+            return {
+                "depth": len(self.ready),
+                "target_depth": self.depth,
+                "pending": self.pending,
+                "refills": self.refills,
+                "misses": self.misses,
+                "last_refill_ms": None if self.last_refill_seconds is None else 1000 * self.last_refill_seconds,
+                "mean_refill_ms": 1000 * self.total_refill_seconds / self.refills if self.refills else None
+            }
@@ -1,7 +1,59 @@
-from Crypto.Util.number import getPrime, inverse
+from Crypto.Util.number import getPrime
+from metrics import metrics
 import random
 import hashlib
 
+WINDOW_BITS = 5  # Window width of the fixed-base tables (2^5 entries per window)
+
+class FixedBaseTable:
+    def __init__(self, base, modulus, exponent_bits, window_bits=WINDOW_BITS):
+        """
+        Precomputes base^(d * 2^(w*i)) mod modulus for every window i and digit d,
+        so that base^k only needs one modular multiplication per w-bit window of k
+        instead of a full square-and-multiply exponentiation.
+        """
+        self.base = base
+        self.modulus = modulus
+        self.window_bits = window_bits
+        self.mask = (1 << window_bits) - 1
+        self.max_exponent = 1 << exponent_bits
+        self.rows = []
+        window_base = base % modulus
+        for _ in range((exponent_bits + window_bits - 1) // window_bits):
+            row = [1] * (1 << window_bits)
+            acc = 1
+            for digit in range(1, 1 << window_bits):
+                acc = (acc * window_base) % modulus
+                row[digit] = acc
+            self.rows.append(row)
+            window_base = (acc * window_base) % modulus  # base^(2^(w*(i+1)))
+
+    def pow(self, exponent):
+        """
+        Computes base^exponent mod modulus using the precomputed windows.
+        """
+        if exponent < 0 or exponent >= self.max_exponent:
+            return pow(self.base, exponent, self.modulus)
+        modulus = self.modulus
+        mask = self.mask
+        result = 1
+        for row in self.rows:
+            if not exponent:
+                break
+            digit = exponent & mask
+            if digit:
+                result = (result * row[digit]) % modulus
+            exponent >>= self.window_bits
+        return result
+
+def build_fixed_base_tables(public_key):
+    """
+    Builds the (g, y) fixed-base tables for a public key.
+    """
+    p, g, y = public_key
+    bits = p.bit_length()
+    return FixedBaseTable(g, p, bits), FixedBaseTable(y, p, bits)
+
 class CardEncryption:
     def __init__(self, public_key):
         """
@@ -13,11 +65,25 @@ class CardEncryption:
         - y is the public component computed as g^(x1 * x2) mod p
         """
         self.public_key = public_key
+        self.exponents = {}  # private keys -> reduced decryption exponent
+        self.tables = None  # (g, y) fixed-base tables, built on the first encryption
+
+    def fixed_base_tables(self):
+        """
+        Returns the (g, y) fixed-base tables for this public key, building them
+        on first use. They live as long as this instance, so a game that keeps
+        one CardEncryption for all its decks builds them once.
+        """
+        tables = self.tables
+        if tables is None:
+            tables = self.tables = build_fixed_base_tables(self.public_key)
+        return tables
 
     @staticmethod
-    def generate_keys():
+    def generate_keys(p=None):
         """
         Generates the public and private keys for ElGamal encryption.
+        A pre-generated prime p (e.g. from a KeyPool) can be passed in to skip the prime search.
         
         The public key is (p, g, y) where:
         - p is a prime number
@@ -29,11 +95,14 @@ class CardEncryption:
         
         This setup is inspired by threshold cryptography, splitting the private key into two parts.
         """
-        p = getPrime(256)  # p is a 256-bit prime
+        if p is None:
+            p = getPrime(256)  # p is a 256-bit prime
+            metrics.count("prime_search", "inline")
         g = random.randint(2, p - 1)  # g is a random generator in the range [2, p-1]
         x1 = random.randint(1, p - 2)  # x1 is a random private key component
         x2 = random.randint(1, p - 2)  # x2 is another random private key component
-        y = pow(g, x1 * x2, p)  # Public key component y = g^(x1 * x2) mod p
+        y = pow(g, (x1 * x2) % (p - 1), p)  # Public key component y = g^(x1 * x2) mod p (exponent reduced mod p-1)
+        metrics.count("modexp", "keygen")
         return (p, g, y), (x1, x2)  # Returns public and private keys
 
     def encrypt_card(self, card_value):
@@ -47,13 +116,30 @@ class CardEncryption:
         - c2 = card_value * y^k mod p (second component of the ciphertext)
 
         This encryption ensures privacy, as the card value is transformed using public information.
+        Both exponentiations use this instance's fixed-base tables for the public key.
         """
-        p, g, y = self.public_key  # Extract public key components
+        p = self.public_key[0]  # Extract the modulus
+        g_table, y_table = self.fixed_base_tables()  # Precomputed powers of g and y
         k = random.randint(1, p - 2)  # Random ephemeral key k
-        c1 = pow(g, k, p)  # First component of the ciphertext: g^k mod p
-        c2 = (card_value * pow(y, k, p)) % p  # Second component: card_value * y^k mod p
+        c1 = g_table.pow(k)  # First component of the ciphertext: g^k mod p
+        c2 = (card_value * y_table.pow(k)) % p  # Second component: card_value * y^k mod p
+        metrics.count("modexp", "encrypt", 2)
         return c1, c2  # Returns the encrypted card as a tuple (c1, c2)
 
+    def encrypt_cards(self, card_values):
+        """
+        Encrypts a batch of card values, e.g. a whole deck, in order.
+        The fixed-base tables for the public key are looked up once for the batch.
+        """
+        p = self.public_key[0]
+        g_table, y_table = self.fixed_base_tables()
+        encrypted = []
+        for card_value in card_values:
+            k = random.randint(1, p - 2)
+            encrypted.append((g_table.pow(k), (card_value * y_table.pow(k)) % p))
+        metrics.count("modexp", "encrypt", 2 * len(encrypted))
+        return encrypted
+
     def decrypt_card(self, encrypted_card, private_keys):
         """
         Decrypts an encrypted card using the private keys (x1, x2).
@@ -61,14 +147,29 @@ class CardEncryption:
         The decryption uses the private keys to recover the original card value.
 
         Decryption:
-        - Compute s = c1^(x1 * x2) mod p
-        - Find the modular inverse of s mod p
+        - Compute s^(-1) = c1^(-(x1 * x2)) mod p in a single exponentiation,
+          using the reduced exponent from decryption_exponent (no separate modular inverse)
         - Recover the card value: card_value = c2 * s^(-1) mod p
         """
         p, _, _ = self.public_key  # Extract the public key's p component
         c1, c2 = encrypted_card  # Extract the encrypted components
-        x1, x2 = private_keys  # Extract the private keys
-        s = pow(c1, x1 * x2, p)  # Compute s = c1^(x1 * x2) mod p
-        s_inv = inverse(s, p)  # Compute the modular inverse of s mod p
+        s_inv = pow(c1, self.decryption_exponent(private_keys), p)  # s^(-1) = c1^(-(x1 * x2)) mod p
         return (c2 * s_inv) % p  # Recover the original card value using the modular inverse
 
+    def decryption_exponent(self, private_keys):
+        """
+        Returns the combined private exponent -(x1 * x2) reduced mod (p - 1).
+
+        Since c1^(p-1) = 1 mod p, c1^(-(x1 * x2)) equals c1 raised to this value,
+        which is below 256 bits instead of the ~512-bit product x1 * x2, and it
+        folds the modular inverse into the same exponentiation. The value is
+        computed once per key pair and cached on this instance.
+        """
+        exponent = self.exponents.get(private_keys)
+        if exponent is None:
+            p = self.public_key[0]
+            x1, x2 = private_keys
+            exponent = (-(x1 * x2)) % (p - 1)
+            self.exponents[private_keys] = exponent
+        return exponent
+
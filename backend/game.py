@@ -1,33 +1,57 @@
 from deck import Deck
+from deck_pipeline import DeckPipeline
 from player import Player
 from encryption import CardEncryption
 from itertools import combinations
 import random
-from zkp import run_party_process  # Import secure shuffle process
+from zkp import run_two_party_shuffle  # Import secure shuffle process
 from zkp_hand import create_hand_commitments, generate_discard_proof, verify_discard_proof
+from melds import min_deadwood, solve_hand_mask
+from cards import CARD_RANKS, CARD_STRINGS, CARD_SUITS, RANK_POINTS
 
 def get_rank(card_value):
     """
     Retrieves the rank of the card based on its value.
     """
-    return (card_value - 1) % 13 + 1
+    return CARD_RANKS[card_value]
 
 def get_suit(card_value):
     """
     Retrieves the suit of the card based on its value.
     """
-    return (card_value - 1) // 13
+    return CARD_SUITS[card_value]
 
 def card_points(rank):
     """
     Determines the points of a card based on its rank.
     """
-    if rank == 1:
-        return 1
-    elif rank >= 11:
-        return 10
-    else:
-        return rank
+    return RANK_POINTS[rank]
+
+# House rules used by Game.knock/check_game_over (and by the batch simulator)
+KNOCK_LIMIT = 10  # Highest deadwood a player may knock with
+GIN_BONUS = 25
+BIG_GIN_BONUS = 31
+UNDERCUT_BONUS = 25
+GAME_TARGET = 100  # Score that ends the game
+SHUFFLE_ROUNDS = 100  # Proof rounds per party in the secure shuffle
+
+def score_knock(knocker_deadwood, defender_deadwood, knocker_hand_size,
+                gin_bonus=GIN_BONUS, big_gin_bonus=BIG_GIN_BONUS, undercut_bonus=UNDERCUT_BONUS):
+    """
+    Scores a knock from both players' deadwood.
+    Returns (knocker_wins, reason, points), where reason is "Big Gin", "Gin",
+    "Undercut" or "Knock".
+    """
+    if knocker_deadwood == 0:
+        # Gin / Big Gin
+        if knocker_hand_size == 11:
+            return True, "Big Gin", big_gin_bonus + defender_deadwood
+        return True, "Gin", gin_bonus + defender_deadwood
+
+    # Regular Knock
+    if defender_deadwood <= knocker_deadwood:
+        return False, "Undercut", (knocker_deadwood - defender_deadwood) + undercut_bonus
+    return True, "Knock", defender_deadwood - knocker_deadwood
 
 def remove_cards(full_list, subset):
     """
@@ -94,9 +118,10 @@ def find_all_runs(cards_same_suit):
     backtrack(0, [])
     return [r for r in results if len(r) >= 3]
 
-def compute_min_deadwood(card_values):
+def compute_min_deadwood_reference(card_values):
     """
-    Computes the minimum deadwood score by evaluating a list of card values.
+    Computes the minimum deadwood score with the original recursive list search.
+    Kept as the reference implementation the bitmask solver is checked against.
     """
     card_list = []
     for val in card_values:
@@ -106,45 +131,111 @@ def compute_min_deadwood(card_values):
     card_list.sort(key=lambda x: (x[1], x[0]))
     return _best_deadwood_recursive(card_list)
 
+def compute_min_deadwood(card_values):
+    """
+    Computes the minimum deadwood score by evaluating a list of card values.
+    Uses the memoized bitmask meld solver from melds.py.
+    """
+    return min_deadwood(card_values)
+
 class Game:
-    def __init__(self):
+    def __init__(self, key_pool=None, shuffle_executor=None, deck_executor=None, deck_queue_depth=1, crypto=None):
         """
         Initializes a new game, sets up the encryption system, creates the deck,
         performs a secure shuffle, deals the initial cards, and verifies the initial shuffle.
+        If a key_pool is given, the ElGamal prime is taken from it instead of being generated.
+        If a shuffle_executor is given, shuffle proofs are verified in batches on it.
+        If a deck_executor is given, the next deck_queue_depth decks are prepared on it
+        in the background so reset_round does not have to shuffle inline.
+        If a crypto executor (see crypto_executor.py) is given, key generation, whole
+        deck builds and the decryption of each deal run on its worker processes.
         """
-        self.public_key, self.private_keys = CardEncryption.generate_keys()
-        self.deck = Deck(self.public_key)
-        
-        # Perform secure shuffle using run_party_process (cryptographic shuffle)
-        deck_after_alice, alice_ok = run_party_process(self.deck.cards, rounds=100)
-        assert alice_ok, "Alice's secure shuffle failed!"
-        deck_final, bob_ok = run_party_process(deck_after_alice, rounds=100)
-        assert bob_ok, "Bob's secure shuffle failed!"
-        
-        # Update deck with the final order and re-encrypt cards
-        self.deck.cards = deck_final
-        self.deck.encrypted_deck = [self.deck.encryption.encrypt_card(card) for card in self.deck.cards]
+        self.shuffle_executor = shuffle_executor
+        self.crypto = crypto
+        if crypto is not None:
+            # Without a pooled prime, the prime search runs on the crypto executor as well
+            prime = key_pool.take(search=False) if key_pool is not None else None
+            self.public_key, self.private_keys = crypto.generate_keys(prime)
+        else:
+            prime = key_pool.take() if key_pool is not None else None
+            self.public_key, self.private_keys = CardEncryption.generate_keys(prime)
+        # One encryptor for every deck of this game, so its fixed-base tables are built once
+        self.encryption = CardEncryption(self.public_key)
+        self.deck_pipeline = DeckPipeline(self.build_shuffled_deck, depth=deck_queue_depth, executor=deck_executor)
         
         # Initialize two players with their private and public keys
         self.players = {
             "player1": Player("Player 1", self.private_keys, self.public_key),
             "player2": Player("Player 2", self.private_keys, self.public_key)
         }
-        # Deal 10 cards to each player
-        for _ in range(10):
-            for plr in self.players.values():
-                plr.receive_card(self.deck.draw_card())
-
-        # Draw the first card for discard pile
-        first_discard = self.deck.draw_card()
-        self.discard = first_discard
-        self.discard_string = self.players["player1"].decrypt_card_string(first_discard)
+        # Deal 10 cards to each player and the first card of the discard pile
+        self.deal(self.deck_pipeline.take())
 
         # Set the turn to player1
         self.turn = "player1"
         self.pending = None
         self.scores = {"player1": 0, "player2": 0}
 
+        # Bumped on every change to the public table state, so serialized views can be cached per version
+        self.version = 0
+
+    def build_shuffled_deck(self):
+        """
+        Builds a ready-to-deal deck: a new deck and the secure shuffle. Cards are
+        encrypted only in their final order: all at once when decks are prepared
+        in the background, otherwise one at a time as they are drawn.
+        Called by the deck pipeline, possibly on a worker thread, so it only reads
+        the game's keys and executors.
+        """
+        deck = Deck(self.public_key, self.encryption)
+        if self.crypto is not None:
+            # Shuffle, proofs and encryption run as one task on the crypto executor
+            deck_final, encrypted = self.crypto.shuffle_deck(self.public_key, deck.cards, SHUFFLE_ROUNDS)
+            assert deck_final is not None, "Secure shuffle failed!"
+            deck.set_order(deck_final, encrypted)
+            return deck
+        
+        # Perform secure shuffle using run_two_party_shuffle (cryptographic shuffle by Alice, then Bob)
+        deck_final, shuffle_ok = run_two_party_shuffle(deck.cards, rounds=SHUFFLE_ROUNDS,
+                                                      executor=self.shuffle_executor)
+        assert shuffle_ok, "Secure shuffle failed!"
+        
+        # Update deck with the final order
+        deck.set_order(deck_final)
+        if self.deck_pipeline.executor is not None:
+            deck.encrypt_remaining()
+        return deck
+
+    def deal(self, deck):
+        """
+        Deals 10 cards to each player from a fresh deck, alternating as at the
+        table, and turns the next card face up on the discard pile.
+        With a crypto executor the 21 cards are decrypted in one batch on it.
+        The game only switches to the new deal once every card is known, so
+        events handled while waiting never see a half-dealt table.
+        """
+        cards = [deck.draw_card() for _ in range(2 * 10 + 1)]
+        values = None
+        if self.crypto is not None:
+            values = self.crypto.decrypt_cards(self.public_key, self.private_keys, cards)
+
+        self.deck = deck
+        for seat, plr in enumerate(self.players.values()):
+            plr.clear_hand()
+            hand = cards[seat:20:2]
+            if values is None:
+                for card in hand:
+                    plr.receive_card(card)
+            else:
+                plr.receive_cards(hand, values[seat:20:2])
+
+        self.discard = cards[20]
+        if values is None:
+            self.discard_string = self.players["player1"].decrypt_card_string(self.discard)
+        else:
+            self.discard_string = CARD_STRINGS[values[20]]
+            self.players["player1"].decryptions += 1  # The face-up card was decrypted in the same batch
+
     def draw_card(self, player_name, source):
         """
         Allows a player to draw a card from the stock or discard pile.
@@ -175,10 +266,11 @@ class Game:
             return {"error": "Invalid source!"}
 
         self.players[player_name].receive_card(card)
+        self.version += 1
 
         return {
             "message": f"{player_name} drew a card from {source}",
-            "deck_size": len(self.deck.encrypted_deck),
+            "deck_size": len(self.deck),
             "turn": self.turn,
             "pending": self.pending,
             "scores": self.scores
@@ -210,16 +302,17 @@ class Game:
         if not verify_discard_proof(proof, hand_commitments):
             return {"error": "Discard validation failed. The card is not part of your hand."}
 
-        # If validation passes, remove the card from the hand
-        player.hand.pop(card_index)
-        self.discard = discarded_card
+        # If validation passes, remove the card from the hand (its plaintext is still cached here)
         self.discard_string = player.decrypt_card_string(discarded_card)
+        player.remove_card(card_index)
+        self.discard = discarded_card
         self.pending = None
         self.turn = "player2" if player_name == "player1" else "player1"
+        self.version += 1
 
         return {
             "message": f"{player_name} discarded a card",
-            "deck_size": len(self.deck.encrypted_deck),
+            "deck_size": len(self.deck),
             "turn": self.turn,
             "discard_string": self.discard_string,
             "scores": self.scores
@@ -232,95 +325,163 @@ class Game:
         """
         knocker = self.players[player_name]
         defender_name = "player1" if player_name == "player2" else "player2"
-        defender = self.players[defender_name]
 
-        knocker_deadwood = compute_min_deadwood(knocker.get_hand_values())
-        defender_deadwood = compute_min_deadwood(defender.get_hand_values())
-
-        if knocker_deadwood > 10:
+        if knocker.deadwood > KNOCK_LIMIT:
             return {"error": "Knock is not possible! Your deadwood is too high."}
 
-        if knocker_deadwood == 0:
-            # Gin / Big Gin
-            if len(knocker.hand) == 11:
-                points = 31 + defender_deadwood
-                result = {"winner": player_name, "reason": "Big Gin", "points": points}
-            else:
-                points = 25 + defender_deadwood
-                result = {"winner": player_name, "reason": "Gin", "points": points}
-            self.scores[player_name] += points
-            return result
-
-        # Regular Knock
-        if defender_deadwood <= knocker_deadwood:
-            points = (knocker_deadwood - defender_deadwood) + 25
-            self.scores[defender_name] += points
-            result = {"winner": defender_name, "reason": "Undercut", "points": points}
-        else:
-            points = defender_deadwood - knocker_deadwood
-            self.scores[player_name] += points
-            result = {"winner": player_name, "reason": "Knock", "points": points}
+        knocker_solution = self.solve_player_hand(player_name)
+        defender_solution = self.solve_player_hand(defender_name)
+        hands = {
+            player_name: self.describe_solution(player_name, knocker_solution),
+            defender_name: self.describe_solution(defender_name, defender_solution)
+        }
+
+        knocker_wins, reason, points = score_knock(
+            knocker_solution["deadwood"], defender_solution["deadwood"], len(knocker.hand))
+        winner = player_name if knocker_wins else defender_name
+        self.scores[winner] += points
+        self.version += 1
+        return {"winner": winner, "reason": reason, "points": points, "hands": hands}
 
-        return result
+    def solve_player_hand(self, player_name):
+        """
+        Returns the optimal meld arrangement of a player's hand (melds, deadwood cards
+        and deadwood score as card values). The solver caches results per hand, so
+        knock, check_for_winner and UI hints share one computation per turn.
+        """
+        return solve_hand_mask(self.players[player_name].hand_mask)
+
+    def describe_solution(self, player_name, solution):
+        """
+        Converts a meld arrangement from card values to readable card strings.
+        """
+        player = self.players[player_name]
+        return {
+            "melds": [[player.card_to_string(val) for val in meld] for meld in solution["melds"]],
+            "deadwood_cards": [player.card_to_string(val) for val in solution["deadwood_cards"]],
+            "deadwood": solution["deadwood"]
+        }
 
     def check_for_winner(self, player_name):
         """
         Checks if a player has won by reaching 0 deadwood and has a valid hand (Gin or Big Gin).
+        The player recomputes its deadwood on every hand change; a Gin ends the round through knock,
+        so it is scored (including the defender's deadwood) the same way.
+        Hands with deadwood between 1 and 10 may knock, but only when the player chooses to.
         """
-        player = self.players[player_name]
-        decrypted_values = player.get_hand_values()
-        deadwood_value = sum(decrypted_values)
-        if deadwood_value == 0 and len(decrypted_values) == 10:
-            return {"winner": player_name, "reason": "Gin!", "points": 25}
-        elif deadwood_value == 0 and len(decrypted_values) == 11:
-            return {"winner": player_name, "reason": "Big Gin!", "points": 31}
-        elif deadwood_value <= 10:
-            return {"winner": player_name, "reason": "Knock!", "points": deadwood_value}
+        if self.players[player_name].deadwood == 0:
+            return self.knock(player_name)
         return None
 
+    def decryption_count(self):
+        """
+        Returns the total number of card decryptions performed by both players so far.
+        """
+        return sum(plr.decryptions for plr in self.players.values())
+
     def check_game_over(self):
         """
         Checks if any player has reached the required score to win the game.
         """
         for player, score in self.scores.items():
-            if score >= 100:
+            if score >= GAME_TARGET:
                 return {"winner": player, "score": score}
         return None
 
     def reset_round(self, reset_scores=False):
         """
-        Resets the round by creating a new deck, performing secure shuffling,
-        and redealing the cards.
+        Resets the round by taking a new securely shuffled deck (prepared in the
+        background when a deck executor is configured) and redealing the cards.
         """
+        # Take the next shuffled, verified and encrypted deck, and redeal
+        self.deal(self.deck_pipeline.take())
         if reset_scores:
             self.scores = {"player1": 0, "player2": 0}
-
-        # Create a new deck
-        self.deck = Deck(self.public_key)
-
-        # *** Secure shuffle process ***
-        # Step 1: "Alice" shuffles 100 times on the initial deck
-        deck_after_alice, alice_ok = run_party_process(self.deck.cards, rounds=100)
-        assert alice_ok, "Alice's secure shuffle failed!"
-
-        # Step 2: "Bob" shuffles 100 times on the deck received from Alice
-        deck_final, bob_ok = run_party_process(deck_after_alice, rounds=100)
-        assert bob_ok, "Bob's secure shuffle failed!"
-
-        # Update deck with the final order and re-encrypt cards
-        self.deck.cards = deck_final
-        self.deck.encrypted_deck = [self.deck.encryption.encrypt_card(card) for card in self.deck.cards]
-
-        # Clear player hands and redeal
-        for plr in self.players.values():
-            plr.hand = []
-        for _ in range(10):
-            for plr in self.players.values():
-                plr.receive_card(self.deck.draw_card())
-
-        # Draw the first card for the discard pile
-        first_discard = self.deck.draw_card()
-        self.discard = first_discard
-        self.discard_string = self.players["player1"].decrypt_card_string(first_discard)
         self.turn = "player1"
         self.pending = None
+        self.version += 1
+
+    def to_state(self):
+        """
+        Returns the game as a JSON-serializable dict for the game store: keys,
+        hands as ciphertexts, the remaining stock (see Deck.stock_state) and the
+        public table state. Stock cards not encrypted yet are stored as values
+        rather than encrypted just for the snapshot; the store holds the keys
+        needed to decrypt every card anyway, so it must be kept private.
+        """
+        stock, stock_pending = self.deck.stock_state()
+        return {
+            "public_key": list(self.public_key),
+            "private_keys": list(self.private_keys),
+            "stock": [list(card) for card in stock],
+            "stock_pending": list(stock_pending),
+            "hands": {name: [list(card) for card in plr.hand] for name, plr in self.players.items()},
+            "discard": list(self.discard) if self.discard else None,
+            "discard_string": self.discard_string,
+            "turn": self.turn,
+            "pending": self.pending,
+            "scores": dict(self.scores),
+            "version": self.version
+        }
+
+    @classmethod
+    def from_state(cls, state, shuffle_executor=None, deck_executor=None, deck_queue_depth=1, crypto=None):
+        """
+        Rebuilds a game saved with to_state, without a new key generation or shuffle.
+        The executors play the same role as in __init__ for the following rounds;
+        with a crypto executor, the hands are also decrypted in one batch on it.
+        """
+        game = cls.__new__(cls)
+        game.shuffle_executor = shuffle_executor
+        game.crypto = crypto
+        game.public_key = tuple(state["public_key"])
+        game.private_keys = tuple(state["private_keys"])
+        game.encryption = CardEncryption(game.public_key)
+        game.deck_pipeline = DeckPipeline(game.build_shuffled_deck, depth=deck_queue_depth, executor=deck_executor)
+        game.deck_pipeline.refill()
+        game.deck = Deck.from_encrypted(game.public_key, state["stock"], state.get("stock_pending", ()),
+                                        game.encryption)
+
+        game.players = {
+            "player1": Player("Player 1", game.private_keys, game.public_key),
+            "player2": Player("Player 2", game.private_keys, game.public_key)
+        }
+        hands = {name: [tuple(card) for card in hand] for name, hand in state["hands"].items()}
+        if crypto is not None:
+            cards = [card for hand in hands.values() for card in hand]
+            values = iter(crypto.decrypt_cards(game.public_key, game.private_keys, cards))
+            for name, hand in hands.items():
+                game.players[name].receive_cards(hand, [next(values) for _ in hand])
+        else:
+            for name, hand in hands.items():
+                for card in hand:
+                    game.players[name].receive_card(card)
+
+        game.discard = tuple(state["discard"]) if state["discard"] else None
+        game.discard_string = state["discard_string"]
+        game.turn = state["turn"]
+        game.pending = state["pending"]
+        game.scores = dict(state["scores"])
+        game.version = state["version"]
+        return game
+
+    def apply_move(self, move):
+        """
+        Replays one move from the game store's log. Moves are logged by app.py
+        only when they succeed, and replaying them is deterministic because the
+        stock is stored in drawing order.
+        """
+        player = move["player"]
+        if move["type"] == "draw":
+            return self.draw_card(player, move["source"])
+        if move["type"] == "discard":
+            response = self.discard_card(player, move["index"])
+            if "error" not in response:
+                self.check_for_winner(player)
+            return response
+        if move["type"] == "knock":
+            return self.knock(player)
+        if move["type"] == "arrange":
+            self.players[player].sethand(move["to"], move["from"])
+            return {}
+        raise ValueError(f"Unknown move type: {move['type']}")
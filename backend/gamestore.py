@@ -0,0 +1,223 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "games.sqlite3")
+FLUSH_INTERVAL = 0.005  # Seconds the writer waits to gather more writes into one commit
+
+class GameStore(ABC):
+    """
+    Interface of a persistent game store: per table, one compact snapshot
+    (Game.to_state) plus an append-only log of the moves made since then.
+    Writing a snapshot discards the log entries it supersedes.
+
+    append, snapshot, delete and expire may return before the data is
+    durable; flush waits until everything written so far is.
+    """
+
+    @abstractmethod
+    def append(self, table_id, move):
+        """
+        Logs a move made at a table since its last snapshot.
+        """
+
+    @abstractmethod
+    def snapshot(self, table_id, state):
+        """
+        Replaces a table's snapshot and discards its logged moves.
+        """
+
+    @abstractmethod
+    def delete(self, table_id):
+        """
+        Forgets a table's snapshot and moves.
+        """
+
+    @abstractmethod
+    def expire(self, max_age):
+        """
+        Forgets every table that has not been written to for max_age seconds.
+        """
+
+    @abstractmethod
+    def load(self, table_id):
+        """
+        Returns (state, moves) for a table, or None when nothing is stored.
+        """
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class SQLiteGameStore(GameStore):
+    def __init__(self, path=DEFAULT_STORE_PATH, flush_interval=FLUSH_INTERVAL):
+        """
+        Game store backed by one SQLite file (the default store).
+
+        Writes are handed to a background thread. The thread commits everything
+        that queued up while the previous commit was running, or within
+        flush_interval, as one transaction. Moves therefore do not wait for
+        the disk, and each batch costs a single fsync. A crash can lose at
+        most the batch that was still being committed. Each snapshot row also
+        records when its table was last written to, for expire.
+
+        Args:
+            path: SQLite database file. It is created readable by its owner
+                  only, since snapshots include the game keys.
+            flush_interval: Seconds to wait for more writes before committing (0 commits at once).
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        self.writes = queue.Queue()
+        self.pending = {}  # Table id -> writes queued for it and not committed yet
+        self.committed = threading.Condition()
+        self.connection = self._connect()
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (table_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL);
+            CREATE TABLE IF NOT EXISTS moves (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_id TEXT NOT NULL,
+                move TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS moves_by_table ON moves (table_id, id);
+        """)
+        columns = [column[1] for column in self.connection.execute("PRAGMA table_info(snapshots)")]
+        if "updated" not in columns:
+            # Stores written before retention existed: their tables count as written now
+            self.connection.execute("ALTER TABLE snapshots ADD COLUMN updated REAL")
+        self.connection.execute("UPDATE snapshots SET updated = ? WHERE updated IS NULL", (time.time(),))
+        self.connection.execute("CREATE INDEX IF NOT EXISTS snapshots_by_updated ON snapshots (updated)")
+        self.read_lock = threading.Lock()
+        self.batches = 0  # Commits performed by the writer
+        self.batched_writes = 0  # Writes included in those commits
+        self.expired = 0  # Tables forgotten by expire
+        self.worker = threading.Thread(target=self._run, name="gamestore", daemon=True)
+        self.worker.start()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")  # fsync on every commit, i.e. once per batch
+        return connection
+
+    def append(self, table_id, move):
+        self._queue("append", table_id, json.dumps(move))
+
+    def snapshot(self, table_id, state):
+        self._queue("snapshot", table_id, json.dumps(state))
+
+    def delete(self, table_id):
+        self._queue("delete", table_id, None)
+
+    def expire(self, max_age):
+        self._queue("expire", None, max_age)
+
+    def _queue(self, kind, table_id, payload):
+        with self.committed:
+            self.pending[table_id] = self.pending.get(table_id, 0) + 1
+        self.writes.put((kind, table_id, payload))
+
+    def load(self, table_id):
+        """
+        Returns (state, moves) for a table, or None when nothing is stored.
+        Waits only for the table's own queued writes, which is usually none:
+        tables are loaded after a restart or an eviction, long after their last move.
+        """
+        with self.committed:
+            self.committed.wait_for(lambda: not self.pending.get(table_id))
+        with self.read_lock:
+            row = self.connection.execute(
+                "SELECT state FROM snapshots WHERE table_id = ?", (table_id,)).fetchone()
+            if row is None:
+                return None
+            moves = self.connection.execute(
+                "SELECT move FROM moves WHERE table_id = ? ORDER BY id", (table_id,)).fetchall()
+        return json.loads(row[0]), [json.loads(move) for (move,) in moves]
+
+    def flush(self):
+        """
+        Blocks until every write queued so far has been committed.
+        """
+        self.writes.join()
+
+    def close(self):
+        self.flush()
+
+    def _run(self):
+        """
+        Writer loop: take one write, gather whatever else queues up within
+        flush_interval, and commit the whole batch in a single transaction.
+        """
+        connection = self._connect()
+        while True:
+            batch = [self.writes.get()]
+            if self.flush_interval:
+                time.sleep(self.flush_interval)
+            while True:
+                try:
+                    batch.append(self.writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._commit(connection, batch)
+            except sqlite3.Error as error:
+                if connection.in_transaction:
+                    connection.rollback()
+                print(f"[gamestore] Dropped a batch of {len(batch)} writes: {error}")
+            finally:
+                with self.committed:
+                    for _, table_id, _ in batch:
+                        self.pending[table_id] -= 1
+                        if not self.pending[table_id]:
+                            del self.pending[table_id]
+                    self.committed.notify_all()
+                for _ in batch:
+                    self.writes.task_done()
+
+    def _commit(self, connection, batch):
+        now = time.time()
+        connection.execute("BEGIN")
+        for kind, table_id, payload in batch:
+            if kind == "append":
+                connection.execute("INSERT INTO moves (table_id, move) VALUES (?, ?)", (table_id, payload))
+                connection.execute("UPDATE snapshots SET updated = ? WHERE table_id = ?", (now, table_id))
+            elif kind == "snapshot":
+                # Writes are applied in order, so every logged move of the table predates the snapshot
+                connection.execute("DELETE FROM moves WHERE table_id = ?", (table_id,))
+                connection.execute("INSERT OR REPLACE INTO snapshots (table_id, state, updated) VALUES (?, ?, ?)",
+                                   (table_id, payload, now))
+            elif kind == "delete":
+                connection.execute("DELETE FROM moves WHERE table_id = ?", (table_id,))
+                connection.execute("DELETE FROM snapshots WHERE table_id = ?", (table_id,))
+            elif kind == "expire":
+                expired = [table for (table,) in connection.execute(
+                    "SELECT table_id FROM snapshots WHERE updated < ?", (now - payload,))]
+                for table in expired:
+                    connection.execute("DELETE FROM moves WHERE table_id = ?", (table,))
+                    connection.execute("DELETE FROM snapshots WHERE table_id = ?", (table,))
+                self.expired += len(expired)
+                # Moves logged for a table after it was deleted have no snapshot to replay onto
+                connection.execute("DELETE FROM moves WHERE table_id NOT IN (SELECT table_id FROM snapshots)")
+        connection.execute("COMMIT")
+        self.batches += 1
+        self.batched_writes += len(batch)
+
+    def stats(self):
+        """
+        Returns how many commits the writer made and how many writes they held.
+        """
+        return {
+            "batches": self.batches,
+            "writes": self.batched_writes,
+            "mean_batch": self.batched_writes / self.batches if self.batches else 0.0,
+            "expired": self.expired,
+            "queued": self.writes.qsize()
+        }
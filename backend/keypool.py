@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from Crypto.Util.number import getPrime
+from metrics import metrics
+
+DEFAULT_POOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keypool.json")
+
+class KeyPool:
+    def __init__(self, path=DEFAULT_POOL_PATH, target_size=32, bits=256):
+        """
+        Keeps a stock of pre-generated ElGamal primes so that building a Game
+        does not have to wait for a prime search.
+
+        Args:
+            path: JSON file the pool is persisted to (None keeps it in memory only).
+            target_size: Number of primes the background worker keeps ready.
+            bits: Size of each prime in bits (matches CardEncryption.generate_keys).
+
+        Primes are public group parameters, so a prime that was handed out
+        just before a crash may be handed out again after a restart; every
+        game still draws its own private keys.
+        """
+        self.path = path
+        self.target_size = target_size
+        self.bits = bits
+        self.primes = deque()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.worker = None
+        self.load()
+
+    def load(self):
+        """
+        Loads previously generated primes from disk, ignoring a missing or corrupt file.
+        """
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("bits") != self.bits:
+            return
+        with self.lock:
+            self.primes.extend(int(p) for p in data.get("primes", []))
+
+    def save(self):
+        """
+        Writes the current pool to disk atomically (write to a temp file, then rename).
+        The temp file is unique to this call, so concurrent saves never publish
+        each other's partly written files.
+        """
+        if not self.path:
+            return
+        with self.lock:
+            data = {"bits": self.bits, "primes": [str(p) for p in self.primes]}
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def take(self, search=True):
+        """
+        Hands out one prime in O(1). Falls back to a cold prime search when the
+        pool is empty (or returns None if search is False, e.g. when the caller
+        searches on a crypto executor), and wakes the worker so it can refill.
+        """
+        with self.lock:
+            prime = self.primes.popleft() if self.primes else None
+        self.wakeup.set()
+        if prime is None and search:
+            prime = getPrime(self.bits)
+            metrics.count("prime_search", "inline")
+        return prime
+
+    def fill(self, count=None):
+        """
+        Generates primes synchronously until the pool holds target_size entries
+        (or until count new primes have been added), then persists the pool.
+        """
+        added = 0
+        while count is None or added < count:
+            with self.lock:
+                if len(self.primes) >= self.target_size:
+                    break
+            prime = getPrime(self.bits)
+            metrics.count("prime_search", "pool")
+            with self.lock:
+                self.primes.append(prime)
+            added += 1
+        if added:
+            self.save()
+        return added
+
+    def start(self):
+        """
+        Starts the background worker that keeps the pool topped up.
+        """
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._run, name="keypool", daemon=True)
+            self.worker.start()
+        return self
+
+    def _run(self):
+        """
+        Worker loop: refill, then sleep until a take() drains the pool again.
+        A failed save is logged and retried on the next refill; the primes
+        stay in memory meanwhile.
+        """
+        while True:
+            try:
+                self.fill()
+            except OSError as error:
+                print(f"[keypool] Could not save the pool to {self.path}: {error}")
+            self.wakeup.wait()
+            self.wakeup.clear()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.primes)
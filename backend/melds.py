@@ -0,0 +1,160 @@
+from functools import lru_cache
+from cards import CARD_POINTS
+from metrics import metrics
+
+# Cards are numbered 1..52; bit (card_value - 1) of a hand mask is set when the card is in the hand.
+# Suit = (card_value - 1) // 13 and rank = (card_value - 1) % 13 + 1, as in game.get_suit/get_rank.
+NUM_CARDS = 52
+NUM_RANKS = 13
+NUM_SUITS = 4
+
+def _card_index(rank, suit):
+    """
+    Returns the bit index of a card given its rank (1-13) and suit (0-3).
+    """
+    return suit * NUM_RANKS + rank - 1
+
+# Deadwood points per bit index (the card table is indexed by card value)
+BIT_POINTS = CARD_POINTS[1:]
+
+def _build_melds():
+    """
+    Enumerates every legal meld as a bit mask: all 3- and 4-card sets of one rank
+    and all runs of 3 or more consecutive ranks in one suit (ace low).
+    """
+    melds = []
+    for rank in range(1, NUM_RANKS + 1):
+        bits = [1 << _card_index(rank, suit) for suit in range(NUM_SUITS)]
+        full = sum(bits)
+        melds.append(full)
+        for bit in bits:
+            melds.append(full ^ bit)
+    for suit in range(NUM_SUITS):
+        for start in range(1, NUM_RANKS + 1):
+            mask = 0
+            for rank in range(start, NUM_RANKS + 1):
+                mask |= 1 << _card_index(rank, suit)
+                if rank - start >= 2:
+                    melds.append(mask)
+    return tuple(melds)
+
+ALL_MELDS = _build_melds()
+
+# For every card, the melds that contain it
+MELDS_BY_CARD = tuple(
+    tuple(meld for meld in ALL_MELDS if meld >> index & 1) for index in range(NUM_CARDS)
+)
+
+def hand_mask(card_values):
+    """
+    Converts a list of card values (1-52) into a 52-bit hand mask.
+    """
+    mask = 0
+    for value in card_values:
+        mask |= 1 << (value - 1)
+    return mask
+
+def mask_points(mask):
+    """
+    Returns the total deadwood points of all cards in a mask.
+    """
+    total = 0
+    while mask:
+        low = mask & -mask
+        total += BIT_POINTS[low.bit_length() - 1]
+        mask ^= low
+    return total
+
+def mask_cards(mask):
+    """
+    Returns the card values (1-52) in a mask, in ascending order.
+    """
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length())
+        mask ^= low
+    return cards
+
+@lru_cache(maxsize=1 << 16)
+def solve_mask(mask):
+    """
+    Returns (deadwood, choice) for a hand mask, where deadwood is the minimum
+    deadwood and choice is the meld mask covering the lowest card in the optimal
+    arrangement (0 when that card is left as deadwood).
+
+    The lowest card in the mask is either left as deadwood or covered by one of
+    the precomputed melds that contain it and fit inside the mask; each choice
+    recurses on the remaining mask, and results are memoized per mask.
+    """
+    if not mask:
+        return 0, 0
+    low = mask & -mask
+    index = low.bit_length() - 1
+    best = BIT_POINTS[index] + solve_mask(mask ^ low)[0]
+    choice = 0
+    for meld in MELDS_BY_CARD[index]:
+        if meld & mask == meld:
+            score = solve_mask(mask ^ meld)[0]
+            if score < best:
+                best = score
+                choice = meld
+                if not best:
+                    break
+    return best, choice
+
+@metrics.timed("call", "min_deadwood")
+def min_deadwood_mask(mask):
+    """
+    Returns the minimum deadwood of a hand mask.
+    """
+    return solve_mask(mask)[0]
+
+def min_deadwood(card_values):
+    """
+    Computes the minimum deadwood score of a list of card values (1-52).
+    """
+    return solve_mask(hand_mask(card_values))[0]
+
+@lru_cache(maxsize=4096)
+def arrange_mask(mask):
+    """
+    Returns the optimal arrangement of a hand mask as a tuple
+    (deadwood, melds, deadwood_cards), where melds is a tuple of card-value tuples.
+    The arrangement is rebuilt from the memoized choices of solve_mask, so it
+    costs one solve plus one cache lookup per meld or deadwood card.
+    """
+    deadwood = solve_mask(mask)[0]
+    melds = []
+    deadwood_cards = []
+    remaining = mask
+    while remaining:
+        choice = solve_mask(remaining)[1]
+        if choice:
+            melds.append(tuple(mask_cards(choice)))
+            remaining ^= choice
+        else:
+            low = remaining & -remaining
+            deadwood_cards.append(low.bit_length())
+            remaining ^= low
+    return deadwood, tuple(melds), tuple(deadwood_cards)
+
+def solve_hand(card_values):
+    """
+    Solves a hand of card values (1-52) in one pass and returns a dictionary with
+    the optimal meld partition, the leftover deadwood cards and the deadwood score.
+    Results are cached per hand mask, so repeated calls within a turn are free.
+    """
+    return solve_hand_mask(hand_mask(card_values))
+
+@metrics.timed("call", "solve_hand")
+def solve_hand_mask(mask):
+    """
+    Same as solve_hand, for a hand that is already represented as a mask.
+    """
+    deadwood, melds, deadwood_cards = arrange_mask(mask)
+    return {
+        "melds": [list(meld) for meld in melds],
+        "deadwood_cards": list(deadwood_cards),
+        "deadwood": deadwood
+    }
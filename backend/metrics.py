@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Metrics are on unless GIN_METRICS=0. When off, timed() returns the function
+# itself and count() returns at once, so instrumented code runs as before.
+ENABLED = os.environ.get("GIN_METRICS", "1") != "0"
+
+# Upper bounds of the latency buckets in seconds (Prometheus "le" values)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Histogram families: key -> (metric name, help text, label name)
+HISTOGRAMS = {
+    "event": ("gin_event_seconds", "Time spent handling a Socket.IO event.", "event"),
+    "call": ("gin_call_seconds", "Time spent in a crypto, proof, solver or emit call.", "call"),
+}
+
+# Counter families: key -> (metric name, help text, label name)
+COUNTERS = {
+    "modexp": ("gin_modexp_total",
+               "Modular exponentiations done for this server's games (card encryption and decryption, "
+               "key generation), including those run on the crypto executor.", "op"),
+    "prime_search": ("gin_prime_searches_total",
+                     "Prime searches for new keys, each running many Miller-Rabin exponentiations "
+                     "(pool: key pool refills, inline: on demand in the server process, executor: on the crypto executor).", "where"),
+}
+
+class Histogram:
+    def __init__(self):
+        """
+        Latency histogram over BUCKETS; counts are per bucket and summed up
+        when rendered.
+        """
+        self.counts = [0] * (len(BUCKETS) + 1)  # The last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+class Metrics:
+    def __init__(self, enabled=ENABLED):
+        """
+        Collects latency histograms and counters, plus gauges read when the
+        metrics are rendered, and renders them in the Prometheus text format.
+        """
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}  # (family, label) -> Histogram
+        self.counters = {}  # (family, label) -> count
+        self.gauges = {}  # metric name -> (help text, callable returning the value)
+
+    def observe(self, family, label, seconds):
+        with self.lock:
+            histogram = self.histograms.get((family, label))
+            if histogram is None:
+                histogram = self.histograms[(family, label)] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, family, label, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[(family, label)] = self.counters.get((family, label), 0) + amount
+
+    def gauge(self, name, help_text, read):
+        """
+        Registers a gauge whose value is read(), called on every render.
+        """
+        self.gauges[name] = (help_text, read)
+
+    def timed(self, family, label=None):
+        """
+        Decorator recording how long each call takes in a histogram family,
+        labelled with label (the function name by default). When metrics are
+        disabled the function is returned unchanged.
+        """
+        def decorate(fn):
+            if not self.enabled:
+                return fn
+            name = label or fn.__name__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(family, name, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        with self.lock:
+            histograms = {key: (list(h.counts), h.total, h.count) for key, h in self.histograms.items()}
+            counters = dict(self.counters)
+        lines = []
+        for family, (name, help_text, label_name) in HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (key, label), (counts, total, count) in sorted(histograms.items()):
+                if key != family:
+                    continue
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS + ("+Inf",), counts):
+                    cumulative += bucket
+                    lines.append(f'{name}_bucket{{{label_name}="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label_name}="{label}"}} {total}')
+                lines.append(f'{name}_count{{{label_name}="{label}"}} {count}')
+        for family, (name, help_text, label_name) in COUNTERS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (key, label), value in sorted(counters.items()):
+                if key == family:
+                    lines.append(f'{name}{{{label_name}="{label}"}} {value}')
+        for name, (help_text, read) in self.gauges.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+# Shared by every module of the server process
+metrics = Metrics()
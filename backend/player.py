@@ -1,4 +1,11 @@
 
+from encryption import CardEncryption
+from cards import CARD_STRINGS
+from melds import min_deadwood_mask
+from metrics import metrics
+
+MAX_CACHED_CARDS = 64  # Upper bound on cached plaintexts per player
+
 class Player:
     def __init__(self, name, private_keys, public_key):
         """
@@ -9,6 +16,11 @@ class Player:
         self.hand = []
         self.private_keys = private_keys # Player's private keys for decrypting cards
         self.public_key = public_key # Public key used for encryption
+        self.decryptor = CardEncryption(public_key) # Shared decryptor instead of one per call
+        self.plaintexts = {} # Ciphertext -> card value for the cards currently in hand
+        self.decryptions = 0 # Number of decryptions performed, for instrumentation
+        self.hand_mask = 0 # 52-bit mask of the card values in hand, kept in sync with self.hand
+        self.deadwood = 0 # Minimum deadwood of the current hand, refreshed on every change
 
     def sethand(self, toIndex, fromIndex):
         """
@@ -16,8 +28,6 @@ class Player:
         This is useful for rearranging cards in the player's hand.
         """
         print(self.hand)
-        from encryption import CardEncryption
-        encryptor = CardEncryption(self.public_key)  # Encryptor to handle card encryption
         newHand = self.hand
         moved = newHand.pop(fromIndex)
         newHand.insert(toIndex, moved)
@@ -28,29 +38,90 @@ class Player:
 
     def receive_card(self, encrypted_card):
         """
-        Adds an encrypted card to the player's hand.
+        Adds an encrypted card to the player's hand and caches its plaintext,
+        so later events can read the hand without decrypting it again.
         """
         self.hand.append(encrypted_card)
+        self.hand_mask |= 1 << (self.card_value(encrypted_card) - 1)
+        self.update_deadwood()
+
+    def receive_cards(self, encrypted_cards, values):
+        """
+        Adds encrypted cards whose plaintexts were already decrypted in one
+        batch (e.g. on the crypto executor). They count as decryptions of this
+        player but are not decrypted again.
+        """
+        self.decryptions += len(encrypted_cards)
+        metrics.count("modexp", "decrypt", len(encrypted_cards))
+        for card, value in zip(encrypted_cards, values):
+            self.plaintexts[card] = value
+            self.receive_card(card)
+
+    def remove_card(self, card_index):
+        """
+        Removes the card at card_index from the hand, drops its cached plaintext
+        and returns the encrypted card.
+        """
+        card = self.hand.pop(card_index)
+        self.hand_mask &= ~(1 << (self.card_value(card) - 1))
+        if card not in self.hand:
+            self.plaintexts.pop(card, None)
+        self.update_deadwood()
+        return card
+
+    def clear_hand(self):
+        """
+        Empties the hand together with the plaintext cache.
+        """
+        self.hand = []
+        self.plaintexts.clear()
+        self.hand_mask = 0
+        self.deadwood = 0
+
+    def update_deadwood(self):
+        """
+        Refreshes the deadwood after the hand mask changed by solving the new
+        mask. This is a full search, not an incremental update: the solver's
+        memo (shared by all tables and bounded) only saves work for sub-hands
+        still cached, so a one-card change still misses about half as often as
+        a cold solve. It runs once per change so reads of deadwood cost nothing.
+        """
+        self.deadwood = min_deadwood_mask(self.hand_mask)
+
+    @metrics.timed("call", "decrypt")
+    def decrypt(self, encrypted_card):
+        """
+        Decrypts a single card with the player's private keys, bypassing the cache.
+        """
+        self.decryptions += 1
+        metrics.count("modexp", "decrypt")
+        return self.decryptor.decrypt_card(encrypted_card, self.private_keys)
+
+    def card_value(self, encrypted_card):
+        """
+        Returns the numeric value of a card, decrypting it only if it is not cached yet.
+        """
+        value = self.plaintexts.get(encrypted_card)
+        if value is None:
+            value = self.decrypt(encrypted_card)
+            if len(self.plaintexts) >= MAX_CACHED_CARDS:
+                # Evict the oldest entry; the hand itself never gets this large
+                self.plaintexts.pop(next(iter(self.plaintexts)))
+            self.plaintexts[encrypted_card] = value
+        return value
 
     def get_hand_values(self):
         """
-        Decrypts all cards in the player's hand and returns their numeric values.
+        Returns the numeric values of the cards in the player's hand (from the plaintext cache).
         """
-        from encryption import CardEncryption
-        decryptor = CardEncryption(self.public_key)
-        # Decrypt each card and return the decrypted values
-        return [decryptor.decrypt_card(card, self.private_keys) for card in self.hand]
+        return [self.card_value(card) for card in self.hand]
 
     def reveal_hand(self):
         """
         Reveals the player's hand as card values.
-        This decrypts each card and converts it to a string format.
+        Each card is converted to a string format using its cached plaintext.
         """
-        from encryption import CardEncryption
-        decryptor = CardEncryption(self.public_key)
-        # Decrypt each card and convert them to strings
-        decrypted = [decryptor.decrypt_card(card, self.private_keys) for card in self.hand]
-        return [self.card_to_string(val) for val in decrypted]
+        return [CARD_STRINGS[val] for val in self.get_hand_values()]
     
     def play_card(self, card_index, valid_cards, game_state):
         """
@@ -61,7 +132,7 @@ class Player:
             raise ValueError("Invalid card index")
 
         # Remove the card from the player's hand
-        played_card = self.hand.pop(card_index)
+        played_card = self.remove_card(card_index)
 
         # Create a Zero Knowledge Proof (ZKP) for the played card to verify its validity
         proof = zkp_valid_move(played_card, valid_cards, game_state)
@@ -74,30 +145,14 @@ class Player:
         """
         Decrypts an encrypted card and converts it into a readable string format.
         """
-        from encryption import CardEncryption
-        decryptor = CardEncryption(self.public_key)
-        # Decrypt the card value and convert it to a string representation
-        numeric_value = decryptor.decrypt_card(encrypted_card, self.private_keys)
+        # Use the cached plaintext if the card is in hand, otherwise decrypt it
+        numeric_value = self.plaintexts.get(encrypted_card)
+        if numeric_value is None:
+            numeric_value = self.decrypt(encrypted_card)
         return self.card_to_string(numeric_value)
 
     def card_to_string(self, card_value):
         """
         Converts a numeric card value into a readable string with rank and suit.
         """
-        suits = ["Hearts", "Diamonds", "Clubs", "Spades"]
-        suit_index = (card_value - 1) // 13
-        rank_num = (card_value - 1) % 13 + 1
-
-        if rank_num == 1:
-            rank_str = "A"
-        elif rank_num == 11:
-            rank_str = "J"
-        elif rank_num == 12:
-            rank_str = "Q"
-        elif rank_num == 13:
-            rank_str = "K"
-        else:
-            rank_str = str(rank_num)
-
-        suit_str = suits[suit_index]
-        return f"{suit_str} {rank_str}"
\ No newline at end of file
+        return CARD_STRINGS[card_value]
\ No newline at end of file
@@ -0,0 +1,123 @@
+PROTOCOL_VERSION = 1
+
+# Fields of a player's view that are diffed between updates; "hand" is diffed separately as card
+# operations and "message" is an event rather than state, so it is sent whenever it is present.
+STATE_FIELDS = ("deck_size", "turn", "pending", "deadwood", "opponent_count", "discard_string", "scores")
+
+def _copy(value):
+    """
+    Copies mutable values (score dicts, hands) so later in-place changes on the
+    game do not alter the state remembered for a client.
+    """
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+def hand_ops(old_hand, new_hand):
+    """
+    Computes the operations that turn old_hand into new_hand. Each operation is a
+    compact list applied in order to the client's copy of the hand:
+
+        ["remove", index]        delete the card at index
+        ["add", index, card]     insert card at index
+        ["move", from, to]       take the card at from and insert it at to
+
+    Card strings are unique within a hand, so a draw becomes a single add, a
+    discard a single remove and a drag-and-drop rearrangement a single move.
+    """
+    ops = []
+    current = list(old_hand)
+    wanted = set(new_hand)
+    for index in range(len(current) - 1, -1, -1):
+        if current[index] not in wanted:
+            del current[index]
+            ops.append(["remove", index])
+
+    index = 0
+    while index < len(new_hand):
+        card = new_hand[index]
+        if index < len(current) and current[index] == card:
+            index += 1
+        elif card not in current:
+            current.insert(index, card)
+            ops.append(["add", index, card])
+            index += 1
+        elif index + 1 < len(current) and current[index + 1] == card:
+            # A single card sits in the way: push it forward to where it belongs
+            target = min(new_hand.index(current[index]), len(current) - 1)
+            current.insert(target, current.pop(index))
+            ops.append(["move", index, target])
+        else:
+            source = current.index(card, index)
+            current.insert(index, current.pop(source))
+            ops.append(["move", source, index])
+            index += 1
+    return ops
+
+def apply_hand_ops(hand, ops):
+    """
+    Applies hand operations produced by hand_ops to a copy of hand and returns it.
+    This mirrors what the frontend does when it receives a state_delta.
+    """
+    hand = list(hand)
+    for op in ops:
+        if op[0] == "remove":
+            del hand[op[1]]
+        elif op[0] == "add":
+            hand.insert(op[1], op[2])
+        elif op[0] == "move":
+            hand.insert(op[2], hand.pop(op[1]))
+    return hand
+
+class StateStream:
+    def __init__(self, encoding="json"):
+        """
+        Tracks what one client (a player seated at a table) has been sent, so that
+        updates can be reduced to the fields that actually changed.
+
+        Every payload carries a sequence number that grows by one per message.
+        A client that sees a gap asks for a resync and receives a full snapshot.
+        encoding is the wire format negotiated with the client ("json" or "msgpack").
+        """
+        self.encoding = encoding
+        self.seq = 0
+        self.state = {}  # Last view of the game sent to the client
+
+    def snapshot(self, state):
+        """
+        Returns a full snapshot payload and remembers it as the client's state.
+        """
+        self.seq += 1
+        self.state = {field: _copy(value) for field, value in state.items() if field != "message"}
+        return {"protocol": PROTOCOL_VERSION, "seq": self.seq, "state": state}
+
+    def delta(self, state):
+        """
+        Returns a delta payload with the fields of state that differ from what the
+        client last received, or None when there is nothing to send. Fields missing
+        from state are treated as unchanged.
+        """
+        changes = {}
+        for field in STATE_FIELDS:
+            if field in state and state[field] != self.state.get(field):
+                changes[field] = state[field]
+                self.state[field] = _copy(state[field])
+
+        ops = []
+        if state.get("hand") is not None:
+            ops = hand_ops(self.state.get("hand", []), state["hand"])
+            self.state["hand"] = list(state["hand"])
+
+        message = state.get("message")
+        if not changes and not ops and not message:
+            return None
+
+        self.seq += 1
+        delta = {"protocol": PROTOCOL_VERSION, "seq": self.seq, "changes": changes}
+        if ops:
+            delta["hand"] = ops
+        if message:
+            delta["message"] = message
+        return delta
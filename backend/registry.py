@@ -0,0 +1,169 @@
+import threading
+import time
+from game import Game
+
+DEFAULT_TABLE = "default"
+IDLE_TIMEOUT = 30 * 60  # Seconds a table may sit untouched before it is evicted
+SNAPSHOT_EVERY = 32  # Logged moves after which a table is snapshotted again
+STORE_RETENTION = 7 * 24 * 60 * 60  # Seconds a stored table is kept without any write
+
+class GameRegistry:
+    def __init__(self, game_factory=Game, idle_timeout=IDLE_TIMEOUT, store=None, game_loader=Game.from_state,
+                 snapshot_every=SNAPSHOT_EVERY, retention=STORE_RETENTION):
+        """
+        Keeps one Game instance per table id so a single server process can
+        host many concurrent matches.
+
+        Args:
+            game_factory: Callable that builds a fresh Game (defaults to Game).
+            idle_timeout: Seconds of inactivity after which a table is evicted.
+            store: Optional GameStore. Tables are then snapshotted when created,
+                   their moves are logged, and a table missing from memory
+                   (after a restart or an eviction) is restored from the store.
+            game_loader: Callable that rebuilds a Game from a stored snapshot.
+            snapshot_every: Logged moves after which a fresh snapshot replaces the log.
+            retention: Seconds after its last write that an abandoned table is
+                       deleted from the store (checked by evict_idle). Finished
+                       games are deleted at once (see finish).
+        """
+        self.game_factory = game_factory
+        self.idle_timeout = idle_timeout
+        self.store = store
+        self.game_loader = game_loader
+        self.snapshot_every = snapshot_every
+        self.retention = retention
+        self.tables = {}  # table id -> Game
+        self.last_seen = {}  # table id -> monotonic time of the last event
+        self.logged_moves = {}  # table id -> moves logged since the last snapshot
+        self.lock = threading.Lock()
+
+    def get(self, table_id):
+        """
+        Returns the game for a table, creating it on first use.
+        Every lookup counts as activity on the table.
+        """
+        with self.lock:
+            game = self.tables.get(table_id)
+            if game is not None:
+                self.last_seen[table_id] = time.monotonic()
+                return game
+        # Build (or restore) the game outside the lock so slow setups do not stall other tables
+        game, needs_snapshot = self._restore(table_id)
+        if game is None:
+            game, needs_snapshot = self.game_factory(), True
+        installed = self._install(table_id, game, replace=False)
+        if installed is game and needs_snapshot:
+            self.save(table_id, game)
+        return installed
+
+    def new_game(self, table_id):
+        """
+        Replaces the game on a table with a brand new one (scores included).
+        """
+        game = self._install(table_id, self.game_factory(), replace=True)
+        self.save(table_id, game)
+        return game
+
+    def _restore(self, table_id):
+        """
+        Rebuilds a table from the store: its snapshot plus the logged moves.
+        Returns (game, replayed) where replayed tells whether any move was
+        applied (a new snapshot then shortens the log), or (None, False) when
+        the table is not stored.
+        """
+        saved = self.store.load(table_id) if self.store is not None else None
+        if saved is None:
+            return None, False
+        state, moves = saved
+        game = self.game_loader(state)
+        for move in moves:
+            game.apply_move(move)
+        print(f"[registry] Restored table {table_id} ({len(moves)} moves replayed)")
+        return game, bool(moves)
+
+    def save(self, table_id, game):
+        """
+        Writes a snapshot of a table to the store, which also compacts its move log.
+        Call it after any change that is not a logged move (e.g. a new round).
+        """
+        if self.store is None:
+            return
+        state = game.to_state()
+        with self.lock:
+            self.logged_moves[table_id] = 0
+        self.store.snapshot(table_id, state)
+
+    def record(self, table_id, game, move):
+        """
+        Appends a successful move to the table's log, and snapshots the table
+        every snapshot_every moves so the log stays short.
+        """
+        if self.store is None:
+            return
+        self.store.append(table_id, move)
+        with self.lock:
+            count = self.logged_moves.get(table_id, 0) + 1
+            self.logged_moves[table_id] = count
+        if count >= self.snapshot_every:
+            self.save(table_id, game)
+
+    def finish(self, table_id):
+        """
+        Deletes a table whose game is over from the store, keys and move log
+        included. The game stays in memory until a new one replaces it (which
+        is stored again) or the table is evicted.
+        """
+        if self.store is None:
+            return
+        with self.lock:
+            self.logged_moves[table_id] = 0
+        self.store.delete(table_id)
+
+    def _install(self, table_id, game, replace):
+        """
+        Stores a freshly built game under the table id. When replace is False and
+        another event already created the table, the existing game wins.
+        """
+        with self.lock:
+            if not replace and table_id in self.tables:
+                game = self.tables[table_id]
+            else:
+                self.tables[table_id] = game
+            self.last_seen[table_id] = time.monotonic()
+            return game
+
+    def remove(self, table_id):
+        """
+        Drops a table from the registry. Returns the removed game or None.
+        """
+        with self.lock:
+            self.last_seen.pop(table_id, None)
+            self.logged_moves.pop(table_id, None)
+            return self.tables.pop(table_id, None)
+
+    def evict_idle(self, now=None):
+        """
+        Removes every table that has not seen an event for idle_timeout seconds,
+        and deletes tables abandoned for longer than retention from the store.
+        Evicted tables stay stored, so they are restored on their next event.
+        Returns the list of evicted table ids.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            expired = [t for t, seen in self.last_seen.items() if now - seen > self.idle_timeout]
+            for table_id in expired:
+                del self.tables[table_id]
+                del self.last_seen[table_id]
+                self.logged_moves.pop(table_id, None)
+        if self.store is not None:
+            self.store.expire(self.retention)
+        return expired
+
+    def __contains__(self, table_id):
+        with self.lock:
+            return table_id in self.tables
+
+    def __len__(self):
+        with self.lock:
+            return len(self.tables)
@@ -0,0 +1,109 @@
+import json
+import weakref
+
+# Compact separators, as used by python-socketio for its own packets
+SEPARATORS = (",", ":")
+
+class Encoded:
+    def __init__(self, text):
+        """
+        A payload that is already JSON-encoded. The packet encoder (see dumps)
+        writes it out verbatim instead of encoding it again.
+        """
+        self.text = text
+
+def dumps(obj, **kwargs):
+    """
+    JSON encoder handed to Socket.IO (SocketIO(json=serializer)) and to the
+    cluster message bus. Encoded payloads anywhere in obj are spliced in as
+    they are; everything else goes through json.dumps.
+    """
+    if isinstance(obj, Encoded):
+        return obj.text
+    fragments = []
+
+    def placeholder(value):
+        if not isinstance(value, Encoded):
+            raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+        fragments.append(value.text)
+        return f"\x00{len(fragments) - 1}\x00"
+
+    text = json.dumps(obj, default=placeholder, **kwargs)
+    for index, fragment in enumerate(fragments):
+        text = text.replace(json.dumps(f"\x00{index}\x00"), fragment, 1)
+    return text
+
+loads = json.loads
+
+# Game -> (version, public dict, public JSON text); entries go away with their game
+_public_cache = weakref.WeakKeyDictionary()
+
+def _public(game):
+    """
+    Returns (dict, JSON text) of the public table state, rebuilt only when the
+    game's version has changed since the last call.
+    """
+    cached = _public_cache.get(game)
+    if cached is not None and cached[0] == game.version:
+        return cached[1], cached[2]
+    state = {
+        "deck_size": len(game.deck),
+        "turn": game.turn,
+        "pending": game.pending,
+        "discard_string": game.discard_string,
+        "scores": dict(game.scores)
+    }
+    text = json.dumps(state, separators=SEPARATORS)
+    _public_cache[game] = (game.version, state, text)
+    return state, text
+
+def _private(game, player, message):
+    """
+    Builds the part of a player's view that nobody else may see, plus the
+    optional one-off message.
+    """
+    opponent = "player1" if player == "player2" else "player2"
+    private = {
+        "hand": game.players[player].reveal_hand(),
+        "deadwood": game.players[player].deadwood,
+        "opponent_count": len(game.players[opponent].hand)
+    }
+    if message:
+        private["message"] = message
+    return private
+
+def public_view(game, message=None):
+    """
+    Returns the public table state as a new dict, e.g. for diffing.
+    """
+    view = dict(_public(game)[0])
+    if message:
+        view["message"] = message
+    return view
+
+def player_view(game, player, message=None):
+    """
+    Returns the full view of the game for one player: the public table state
+    plus the player's own decrypted hand, deadwood and the opponent's card count.
+    """
+    view = public_view(game)
+    view.update(_private(game, player, message))
+    return view
+
+def encode_public_view(game, message=None):
+    """
+    Returns the public table state as an Encoded payload. The public part is
+    encoded once per game version however many recipients it is sent to.
+    """
+    text = _public(game)[1]
+    if message:
+        text = text[:-1] + "," + json.dumps({"message": message}, separators=SEPARATORS)[1:]
+    return Encoded(text)
+
+def encode_player_view(game, player, message=None):
+    """
+    Returns player_view(game, player, message) as an Encoded payload: the
+    cached public JSON with only the player's private section encoded per call.
+    """
+    private = json.dumps(_private(game, player, message), separators=SEPARATORS)
+    return Encoded(_public(game)[1][:-1] + "," + private[1:])
@@ -0,0 +1,311 @@
+"""
+Headless batch simulator for tuning house rules (knock limit, gin/undercut
+bonuses, game target).
+
+Deals N games at once as NumPy arrays in plaintext (no encryption or shuffle
+proofs), plays them with a pluggable draw/discard policy and reports score and
+deadwood distributions. Deadwood comes from the same meld solver as the server
+(melds.py) and knocks are scored with game.score_knock, so the numbers match
+what the live server would award.
+
+Requires numpy (pip install numpy); the game server itself does not.
+
+Usage (from the backend folder):
+    python simulator.py --hands 100000 --policy greedy --knock-limit 10
+    python simulator.py --games 10000 --target 100
+"""
+import argparse
+import numpy as np
+from cards import CARD_POINTS
+from game import BIG_GIN_BONUS, GAME_TARGET, GIN_BONUS, KNOCK_LIMIT, UNDERCUT_BONUS, score_knock
+from melds import min_deadwood_mask
+
+# Cards are handled as bit indices 0..51 (card value - 1), like the hand masks in melds.py
+NUM_CARDS = 52
+HAND_SIZE = 10
+REASONS = ("Draw", "Knock", "Gin", "Big Gin", "Undercut")
+REASON_CODES = {reason: code for code, reason in enumerate(REASONS)}
+BIT_WEIGHTS = np.uint64(1) << np.arange(NUM_CARDS, dtype=np.uint64)
+INDEX_POINTS = np.array(CARD_POINTS[1:], dtype=np.int16)
+
+def hand_masks(hands):
+    """
+    Converts an (M, 52) boolean hand array into a list of Python int hand masks.
+    """
+    return (hands.astype(np.uint64) * BIT_WEIGHTS).sum(axis=1).tolist()
+
+def deadwood_of(hands):
+    """
+    Returns the minimum deadwood of every hand in an (M, 52) boolean array.
+    """
+    return np.fromiter((min_deadwood_mask(mask) for mask in hand_masks(hands)),
+                       dtype=np.int16, count=len(hands))
+
+def loose_cards(hands):
+    """
+    Marks, for every hand in an (M, 52) boolean array, the cards that cannot be part
+    of any meld in that hand: fewer than three of their rank and no two suit
+    neighbours forming a run. Loose cards are always deadwood.
+    """
+    grid = hands.reshape(-1, 4, 13)
+    in_set = grid & (grid.sum(axis=1) >= 3)[:, None, :]
+    padded = np.pad(grid, ((0, 0), (0, 0), (2, 2)))
+    left2, left1 = padded[:, :, 0:13], padded[:, :, 1:14]
+    right1, right2 = padded[:, :, 3:16], padded[:, :, 4:17]
+    in_run = grid & ((left2 & left1) | (left1 & right1) | (right1 & right2))
+    return hands & ~(in_set | in_run).reshape(hands.shape)
+
+def deadwood_lower_bound(hands):
+    """
+    Vectorized lower bound on the deadwood of every hand: the points of its loose
+    cards. Hands whose bound is above the knock limit can skip the exact solve.
+    """
+    return (loose_cards(hands) * INDEX_POINTS).sum(axis=1)
+
+def deadwood_at_most(hands, limit):
+    """
+    Returns the exact deadwood of every hand that can be within limit, and
+    limit + 1 for hands the lower bound already rules out.
+    """
+    deadwood = np.full(len(hands), limit + 1, dtype=np.int16)
+    candidates = np.flatnonzero(deadwood_lower_bound(hands) <= limit)
+    if len(candidates):
+        deadwood[candidates] = deadwood_of(hands[candidates])
+    return deadwood
+
+def best_discard(mask, loose=0):
+    """
+    Returns (card index, deadwood after discarding it) for the discard that leaves
+    the lowest deadwood, preferring the highest-point card on ties.
+
+    loose is the mask of loose cards in the hand (see loose_cards). Discarding a
+    card lowers the deadwood by at most its points, and by exactly its points when
+    it is loose, so only the highest-point loose cards and the melded cards worth
+    at least as much need to be solved.
+    """
+    candidates = mask
+    if loose:
+        top = max(INDEX_POINTS[i] for i in _bits(loose))
+        candidates = 0
+        for index in _bits(mask):
+            if INDEX_POINTS[index] >= top:
+                candidates |= 1 << index
+    best = None
+    for index in _bits(candidates):
+        key = (min_deadwood_mask(mask ^ (1 << index)), -INDEX_POINTS[index])
+        if best is None or key < best[0]:
+            best = (key, index)
+    return best[1], best[0][0]
+
+def _bits(mask):
+    """
+    Yields the bit indices set in a mask, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class RandomPolicy:
+    """
+    Always draws from the stock and discards a uniformly random card. Fully vectorized.
+    """
+    def choose_draw(self, hands, discard, rng):
+        return np.zeros(len(hands), dtype=bool)
+
+    def choose_discard(self, hands, rng):
+        return np.argmax(rng.random(hands.shape) * hands, axis=1)
+
+class GreedyPolicy:
+    """
+    Takes the discard when it lowers the deadwood reachable this turn, and discards
+    the card that leaves the lowest deadwood.
+    """
+    def choose_draw(self, hands, discard, rng):
+        with_discard = hands.copy()
+        with_discard[np.arange(len(hands)), discard] = True
+        take = np.zeros(len(hands), dtype=bool)
+        rows = zip(hand_masks(hands), hand_masks(with_discard), hand_masks(loose_cards(with_discard)))
+        for i, (mask, extended, loose) in enumerate(rows):
+            take[i] = best_discard(extended, loose)[1] < min_deadwood_mask(mask)
+        return take
+
+    def choose_discard(self, hands, rng):
+        rows = zip(hand_masks(hands), hand_masks(loose_cards(hands)))
+        return np.fromiter((best_discard(mask, loose)[0] for mask, loose in rows),
+                           dtype=np.int64, count=len(hands))
+
+POLICIES = {"random": RandomPolicy, "greedy": GreedyPolicy}
+
+def deal(num_games, rng):
+    """
+    Shuffles num_games decks and deals them the way Game does: ten cards to each
+    player alternately, then one card to the discard pile.
+    Returns (decks, hands, discard, cursor).
+    """
+    decks = np.argsort(rng.random((num_games, NUM_CARDS)), axis=1)
+    hands = np.zeros((num_games, 2, NUM_CARDS), dtype=bool)
+    rows = np.arange(num_games)[:, None]
+    hands[rows, 0, decks[:, 0:2 * HAND_SIZE:2]] = True
+    hands[rows, 1, decks[:, 1:2 * HAND_SIZE:2]] = True
+    discard = decks[:, 2 * HAND_SIZE].copy()
+    cursor = np.full(num_games, 2 * HAND_SIZE + 1)
+    return decks, hands, discard, cursor
+
+def simulate_hands(num_games, policy, rng, knock_limit=KNOCK_LIMIT, gin_bonus=GIN_BONUS,
+                   big_gin_bonus=BIG_GIN_BONUS, undercut_bonus=UNDERCUT_BONUS):
+    """
+    Plays one hand in each of num_games games until someone knocks or the stock runs out.
+    Player 0 moves first, as player1 does on the server. A player knocks as soon as
+    their deadwood after discarding is within knock_limit.
+
+    Returns a dictionary of per-game arrays: winner (0/1, -1 for a drawn hand),
+    reason (index into REASONS), points, knocker (-1 if nobody knocked),
+    deadwood (final deadwood of both players) and turns.
+    """
+    decks, hands, discard, cursor = deal(num_games, rng)
+    turn = np.zeros(num_games, dtype=np.int8)
+    active = np.ones(num_games, dtype=bool)
+    results = {
+        "winner": np.full(num_games, -1, dtype=np.int8),
+        "reason": np.zeros(num_games, dtype=np.int8),
+        "points": np.zeros(num_games, dtype=np.int16),
+        "knocker": np.full(num_games, -1, dtype=np.int8),
+        "deadwood": np.zeros((num_games, 2), dtype=np.int16),
+        "turns": np.zeros(num_games, dtype=np.int16),
+    }
+
+    def finish(games, knockers, knocker_deadwood, hand_size):
+        # Scores knocks with the server's rules; called once per finished hand
+        defenders = 1 - knockers
+        defender_deadwood = deadwood_of(hands[games, defenders])
+        for game, knocker, kd, dd in zip(games.tolist(), knockers.tolist(),
+                                         knocker_deadwood.tolist(), defender_deadwood.tolist()):
+            knocker_wins, reason, points = score_knock(kd, dd, hand_size, gin_bonus=gin_bonus,
+                                                       big_gin_bonus=big_gin_bonus,
+                                                       undercut_bonus=undercut_bonus)
+            results["winner"][game] = knocker if knocker_wins else 1 - knocker
+            results["reason"][game] = REASON_CODES[reason]
+            results["points"][game] = points
+            results["knocker"][game] = knocker
+            results["deadwood"][game, knocker] = kd
+            results["deadwood"][game, 1 - knocker] = dd
+        active[games] = False
+
+    while active.any():
+        games = np.flatnonzero(active)
+        current = turn[games]
+        results["turns"][games] += 1
+
+        take = policy.choose_draw(hands[games, current], discard[games], rng)
+
+        # A stock draw from an empty stock ends the hand without a winner
+        exhausted = ~take & (cursor[games] >= NUM_CARDS)
+        if exhausted.any():
+            done = games[exhausted]
+            results["deadwood"][done, 0] = deadwood_of(hands[done, 0])
+            results["deadwood"][done, 1] = deadwood_of(hands[done, 1])
+            active[done] = False
+            games, current, take = games[~exhausted], current[~exhausted], take[~exhausted]
+            if not len(games):
+                break
+
+        drawn = np.where(take, discard[games], decks[games, np.minimum(cursor[games], NUM_CARDS - 1)])
+        cursor[games] += ~take
+        hands[games, current, drawn] = True
+
+        # Eleven cards with no deadwood is a Big Gin before discarding
+        big_gin = deadwood_at_most(hands[games, current], 0) == 0
+        if big_gin.any():
+            finish(games[big_gin], current[big_gin], np.zeros(big_gin.sum(), dtype=np.int16), HAND_SIZE + 1)
+            games, current = games[~big_gin], current[~big_gin]
+            if not len(games):
+                continue
+
+        held = hands[games, current]
+        thrown = policy.choose_discard(held, rng)
+        hands[games, current, thrown] = False
+        discard[games] = thrown
+
+        knocker_deadwood = deadwood_at_most(hands[games, current], knock_limit)
+        knocks = knocker_deadwood <= knock_limit
+        if knocks.any():
+            finish(games[knocks], current[knocks], knocker_deadwood[knocks], HAND_SIZE)
+        turn[games[~knocks]] ^= 1
+
+    return results
+
+def simulate_games(num_games, policy, rng, target=GAME_TARGET, **rules):
+    """
+    Plays num_games full games, hand after hand, until one player reaches target
+    (as in Game.check_game_over). Returns a dictionary with the final scores
+    (num_games, 2), the winner of each game and the number of hands played.
+    """
+    scores = np.zeros((num_games, 2), dtype=np.int32)
+    hands_played = np.zeros(num_games, dtype=np.int32)
+    active = np.ones(num_games, dtype=bool)
+    while active.any():
+        games = np.flatnonzero(active)
+        result = simulate_hands(len(games), policy, rng, **rules)
+        won = result["winner"] >= 0
+        scores[games[won], result["winner"][won]] += result["points"][won]
+        hands_played[games] += 1
+        active[games] = scores[games].max(axis=1) < target
+    return {"scores": scores, "winner": np.argmax(scores, axis=1), "hands": hands_played}
+
+def summarize_hands(results):
+    """
+    Builds a summary of simulate_hands output: outcome frequencies, points and
+    deadwood percentiles, and the knocker deadwood histogram.
+    """
+    count = len(results["winner"])
+    scored = results["winner"] >= 0
+    knocked = results["knocker"] >= 0
+    rows = np.flatnonzero(knocked)
+    knocker_deadwood = results["deadwood"][rows, results["knocker"][rows]]
+    percentiles = (50, 90, 99)
+    return {
+        "hands": count,
+        "outcomes": {reason: float(np.mean(results["reason"] == code)) for code, reason in enumerate(REASONS)},
+        "first_player_win_rate": float(np.mean(results["winner"][scored] == 0)) if scored.any() else 0.0,
+        "points": {
+            "mean": float(results["points"][scored].mean()) if scored.any() else 0.0,
+            **{f"p{q}": float(np.percentile(results["points"][scored], q)) if scored.any() else 0.0
+               for q in percentiles},
+        },
+        "turns": {"mean": float(results["turns"].mean())},
+        "knocker_deadwood_histogram": np.bincount(knocker_deadwood, minlength=11).tolist(),
+        "final_deadwood": {f"p{q}": float(np.percentile(results["deadwood"], q)) for q in percentiles},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch Gin Rummy simulator for house-rule tuning")
+    parser.add_argument("--hands", type=int, default=10000, help="number of independent hands to play")
+    parser.add_argument("--games", type=int, default=0, help="play full games to --target instead of single hands")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--knock-limit", type=int, default=KNOCK_LIMIT)
+    parser.add_argument("--gin-bonus", type=int, default=GIN_BONUS)
+    parser.add_argument("--big-gin-bonus", type=int, default=BIG_GIN_BONUS)
+    parser.add_argument("--undercut-bonus", type=int, default=UNDERCUT_BONUS)
+    parser.add_argument("--target", type=int, default=GAME_TARGET)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    policy = POLICIES[args.policy]()
+    rules = {"knock_limit": args.knock_limit, "gin_bonus": args.gin_bonus,
+             "big_gin_bonus": args.big_gin_bonus, "undercut_bonus": args.undercut_bonus}
+
+    if args.games:
+        result = simulate_games(args.games, policy, rng, target=args.target, **rules)
+        print(f"games: {args.games}")
+        print(f"first player win rate: {np.mean(result['winner'] == 0):.3f}")
+        print(f"hands per game: mean {result['hands'].mean():.2f}, p99 {np.percentile(result['hands'], 99):.0f}")
+        print(f"winning score: mean {result['scores'].max(axis=1).mean():.1f}")
+    else:
+        summary = summarize_hands(simulate_hands(args.hands, policy, rng, **rules))
+        for key, value in summary.items():
+            print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import json
+import threading
+import serializer
+
+HIGH_WATER = 64  # Queued packets after which a spectator stops receiving live events
+LOW_WATER = 8  # Queued packets below which a lagging spectator is resynced and resumed
+
+def spectator_room(table_id):
+    """
+    Returns the Socket.IO room of the spectators who are keeping up with a table.
+    """
+    return f"spectators:{table_id}"
+
+class SpectatorHub:
+    def __init__(self, socketio, high_water=HIGH_WATER, low_water=LOW_WATER):
+        """
+        Streams public-only table events (draws, discards, knocks, round and game
+        results) to spectators. Private hands never enter this stream.
+
+        Each event is encoded once and sent with a single room emit, which
+        python-socketio turns into one packet for every socket in the room.
+        Spectators whose outgoing queue grows past high_water are taken out of
+        the room instead of buffering without bound. Once their queue drains
+        below low_water they get a fresh snapshot and rejoin the live stream.
+
+        Args:
+            socketio: The flask_socketio.SocketIO instance used to emit.
+            high_water: Queued packets at which a spectator is considered lagging.
+            low_water: Queued packets at which a lagging spectator is resumed.
+        """
+        self.socketio = socketio
+        self.high_water = high_water
+        self.low_water = low_water
+        self.tables = {}  # table id -> set of spectator sids
+        self.lagging = {}  # table id -> set of sids taken out of the live room
+        self.seq = {}  # table id -> sequence number of the last event
+        self.dropped = 0  # Events not delivered to lagging spectators
+        self.lock = threading.Lock()
+
+    def join(self, sid, table_id, game):
+        """
+        Adds a socket to a table's spectators and sends it the current public state.
+        """
+        with self.lock:
+            self.tables.setdefault(table_id, set()).add(sid)
+        self.socketio.server.enter_room(sid, spectator_room(table_id))
+        self.send_snapshot(sid, table_id, game)
+
+    def leave(self, sid):
+        """
+        Removes a socket from every table it is watching (e.g. on disconnect).
+        """
+        with self.lock:
+            for table_id in [t for t, sids in self.tables.items() if sid in sids]:
+                self.tables[table_id].discard(sid)
+                self.lagging.get(table_id, set()).discard(sid)
+                if not self.tables[table_id]:
+                    self._forget(table_id)
+
+    def remove_table(self, table_id):
+        """
+        Forgets a table, e.g. after it was evicted from the registry, and takes
+        its spectators out of the table's room so a reused table id starts empty.
+        """
+        with self.lock:
+            sids = self.tables.get(table_id, set())
+            self._forget(table_id)
+        room = spectator_room(table_id)
+        for sid in sids:
+            self.socketio.server.leave_room(sid, room)
+
+    def _forget(self, table_id):
+        self.tables.pop(table_id, None)
+        self.lagging.pop(table_id, None)
+        self.seq.pop(table_id, None)
+
+    def send_snapshot(self, sid, table_id, game):
+        """
+        Sends one spectator the public state of the table together with the
+        sequence number of the last event it reflects.
+        """
+        with self.lock:
+            seq = self.seq.get(table_id, 0)
+        payload = serializer.Encoded(
+            '{"seq":%d,"state":%s}' % (seq, serializer.encode_public_view(game).text))
+        self.socketio.emit("spectator_snapshot", payload, to=sid)
+
+    def publish(self, table_id, game, event, **fields):
+        """
+        Sends one public event to everyone watching a table. The payload is
+        {"seq", "event", ...fields, "state"} where state is the public view,
+        reused from the per-version serializer cache.
+        """
+        with self.lock:
+            if not self.tables.get(table_id):
+                return
+            seq = self.seq.get(table_id, 0) + 1
+            self.seq[table_id] = seq
+        self.apply_backpressure(table_id, game)
+
+        header = dict(seq=seq, event=event, **fields)
+        text = json.dumps(header, separators=serializer.SEPARATORS)[:-1]
+        payload = serializer.Encoded(text + ',"state":' + serializer.encode_public_view(game).text + "}")
+        self.socketio.emit("table_event", payload, room=spectator_room(table_id))
+
+    def apply_backpressure(self, table_id, game):
+        """
+        Moves spectators whose queue is past high_water out of the live room and
+        resumes (with a snapshot) those that have drained below low_water.
+        The hub's state changes under the lock; room changes and snapshots
+        are sent after it is released.
+        """
+        with self.lock:
+            sids = list(self.tables.get(table_id, ()))
+        pending = {sid: self.queued_packets(sid) for sid in sids}
+        paused, resumed = [], []
+        with self.lock:
+            watching = self.tables.get(table_id)
+            if not watching:
+                return  # The table was forgotten meanwhile
+            lagging = self.lagging.setdefault(table_id, set())
+            for sid, queued in pending.items():
+                if sid not in watching:
+                    continue  # Left meanwhile
+                if sid in lagging:
+                    if queued <= self.low_water:
+                        lagging.discard(sid)
+                        resumed.append(sid)
+                    else:
+                        self.dropped += 1
+                elif queued >= self.high_water:
+                    lagging.add(sid)
+                    paused.append(sid)
+                    self.dropped += 1
+        room = spectator_room(table_id)
+        for sid in paused:
+            self.socketio.server.leave_room(sid, room)
+        for sid in resumed:
+            self.socketio.server.enter_room(sid, room)
+            self.send_snapshot(sid, table_id, game)
+
+    def queued_packets(self, sid):
+        """
+        Returns how many packets are waiting in a socket's outgoing Engine.IO
+        queue (0 when the socket has no queue, e.g. with the test client).
+        """
+        server = self.socketio.server
+        eio_sid = server.manager.eio_sid_from_sid(sid, "/")
+        eio_socket = server.eio.sockets.get(eio_sid) if eio_sid else None
+        if eio_socket is None:
+            return 0
+        return eio_socket.queue.qsize()
+
+    def stats(self):
+        """
+        Returns per-table spectator and lagging counts plus the dropped-event total.
+        """
+        with self.lock:
+            tables = {table_id: {"spectators": len(sids), "lagging": len(self.lagging.get(table_id, ()))}
+                      for table_id, sids in self.tables.items()}
+        return {"tables": tables, "dropped": self.dropped}
@@ -0,0 +1,78 @@
+"""
+Tables restored from the game store after a restart.
+"""
+import time
+import pytest
+from gamestore import SQLiteGameStore
+from registry import GameRegistry
+
+GIN_HAND = list(range(1, 11))  # Hearts A-10: one run, no deadwood
+EXTRA_CARD = 52  # Spades K, discarded to go gin
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteGameStore(str(tmp_path / "games.sqlite3"), flush_interval=0)
+    yield store
+    store.close()
+
+@pytest.fixture
+def server(store):
+    """
+    The app module with its registry writing to a temporary store, snapshotting
+    after every logged move.
+    """
+    import app
+    real_store, real_snapshot_every = app.registry.store, app.registry.snapshot_every
+    app.registry.store, app.registry.snapshot_every = store, 1
+    yield app
+    app.registry.store, app.registry.snapshot_every = real_store, real_snapshot_every
+
+def restart(store):
+    return GameRegistry(store=store)
+
+def go_gin(server, table_id, score=0):
+    """
+    Seats player1 at a table with a drawn hand that is gin once the extra card
+    is discarded (starting from score points), snapshots it, and discards.
+    Returns the game and the result event sent to the table.
+    """
+    client = server.socketio.test_client(server.app)
+    client.emit("join_game", {"player": "player1", "table": table_id})
+    game = server.registry.get(table_id)
+    player = game.players["player1"]
+    player.clear_hand()
+    for value in GIN_HAND + [EXTRA_CARD]:
+        player.receive_card(game.encryption.encrypt_card(value))
+    game.turn, game.pending = "player1", "player1"
+    game.scores["player1"] = score
+    server.registry.save(table_id, game)
+
+    client.emit("discard_card", {"player": "player1", "cardIndex": len(GIN_HAND), "table": table_id})
+    events = [packet["name"] for packet in client.get_received() if packet["name"] in ("round_over", "game_over")]
+    client.disconnect()
+    server.registry.remove(table_id)
+    return game, events[0]
+
+def test_gin_score_survives_restart(server, store):
+    game, event = go_gin(server, "test-gin-restart")
+    assert event == "round_over"
+    assert game.scores["player1"] > 0
+    assert restart(store).get("test-gin-restart").scores == game.scores
+
+def test_game_over_deletes_stored_table(server, store):
+    _, event = go_gin(server, "test-game-over", score=99)
+    assert event == "game_over"
+    store.flush()
+    assert store.load("test-game-over") is None
+
+def test_expire_forgets_abandoned_tables(store):
+    store.snapshot("abandoned", {"version": 1})
+    store.append("abandoned", {"type": "draw"})
+    store.flush()
+    time.sleep(0.3)
+    store.snapshot("active", {"version": 1})
+    registry = GameRegistry(store=store, retention=0.2)
+    registry.evict_idle()
+    store.flush()
+    assert store.load("abandoned") is None
+    assert store.load("active") == ({"version": 1}, [])
@@ -0,0 +1,53 @@
+"""
+Shuffle commitments in both formats, including pair data made before versioning.
+"""
+import hashlib
+import random
+import pytest
+import zkp
+
+DECK = list(range(1, 53))
+
+def pre_versioning_pair(deck, seed1, seed2):
+    """
+    Pair data exactly as zkp_generate_permutation_pair built it before commitments
+    were versioned: global-RNG shuffles, hex commitments of the list form, no "version".
+    """
+    perm1 = deck.copy()
+    random.seed(seed1)
+    random.shuffle(perm1)
+    perm2 = perm1.copy()
+    random.seed(seed2)
+    random.shuffle(perm2)
+    return {
+        "perm1": perm1,
+        "commitment1": hashlib.sha256((str(perm1) + str(seed1)).encode()).hexdigest(),
+        "perm2": perm2,
+        "commitment2": hashlib.sha256((str(perm2) + str(seed2)).encode()).hexdigest(),
+        "seed1": seed1,
+        "seed2": seed2
+    }
+
+def verify(deck, pair_data, challenge_bit):
+    revealed = zkp.zkp_reveal_mapping(pair_data, challenge_bit)
+    source = deck if challenge_bit == 0 else pair_data["perm1"]
+    return zkp.zkp_verify_mapping(source, pair_data, challenge_bit, revealed)
+
+@pytest.mark.parametrize("challenge_bit", [0, 1])
+def test_pre_versioning_pair_verifies(challenge_bit):
+    pair_data = pre_versioning_pair(DECK, 123456789, 987654321)
+    assert verify(DECK, pair_data, challenge_bit)
+
+@pytest.mark.parametrize("challenge_bit", [0, 1])
+def test_pre_versioning_pair_with_wrong_seed_fails(challenge_bit):
+    pair_data = pre_versioning_pair(DECK, 123456789, 987654321)
+    revealed = dict(zkp.zkp_reveal_mapping(pair_data, challenge_bit), seed=42)
+    source = DECK if challenge_bit == 0 else pair_data["perm1"]
+    assert not zkp.zkp_verify_mapping(source, pair_data, challenge_bit, revealed)
+
+@pytest.mark.parametrize("version", [zkp.COMMITMENT_V1, zkp.COMMITMENT_V2])
+@pytest.mark.parametrize("challenge_bit", [0, 1])
+def test_generated_pair_verifies(version, challenge_bit):
+    deck = bytes(DECK)
+    pair_data = zkp.zkp_generate_permutation_pair(deck, version=version)
+    assert verify(deck, pair_data, challenge_bit)
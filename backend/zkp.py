@@ -1,8 +1,106 @@
-import random
 import hashlib
+import os
+import random
 import secrets
+from concurrent.futures import ProcessPoolExecutor
+
+SHUFFLE_DOMAIN = b"secure-gin-rummy/shuffle/v1:"  # Domain separation for the shuffle stream
+SEED_BITS = 128  # Size of the random shuffle seeds
+
+def shuffle_stream(seed, length):
+    """
+    Returns length pseudo-random bytes derived from the seed with SHAKE-256.
+    Every call builds its own hash object, so concurrent shuffles never share state.
+    Longer streams start with the same bytes as shorter ones.
+    """
+    return hashlib.shake_256(SHUFFLE_DOMAIN + str(seed).encode()).digest(length)
+
+def seeded_shuffle(deck, seed):
+    """
+    Deterministically shuffles a deck with a Fisher-Yates shuffle driven by the
+    seed's SHAKE-256 stream (two bytes per swap, with rejection sampling so every
+    permutation is equally likely).
+
+    :param deck: The deck as bytes (one byte per card) or a list of card values.
+    :param seed: Integer seed.
+    :return: The shuffled deck as bytes.
+    """
+    items = bytearray(deck)
+    length = 4 * len(items)
+    stream = shuffle_stream(seed, length)
+    pos = 0
+    for i in range(len(items) - 1, 0, -1):
+        bound = i + 1
+        limit = 65536 - 65536 % bound
+        while True:
+            if pos + 2 > length:
+                length *= 2
+                stream = shuffle_stream(seed, length)
+            r = (stream[pos] << 8) | stream[pos + 1]
+            pos += 2
+            if r < limit:
+                break
+        j = r % bound
+        items[i], items[j] = items[j], items[i]
+    return bytes(items)
+
+# Commitment formats. Pair data records its version, so verifiers for either format can coexist.
+# The version also fixes the shuffle the seeds drive, since both are checked when verifying.
+COMMITMENT_V1 = 1  # Original format: Mersenne Twister shuffle, sha256(str(list(perm)) + str(seed)) as hex
+COMMITMENT_V2 = 2  # SHAKE-256 shuffle, sha256(prefix || len || perm bytes || len || seed bytes) as raw 32 bytes
+DEFAULT_COMMITMENT_VERSION = COMMITMENT_V2
+
+def legacy_shuffle(deck, seed):
+    """
+    The original shuffle: random.shuffle seeded with the seed (same as random.seed(seed)
+    followed by random.shuffle), on a private Random so the global RNG is left alone.
+    Only used to verify v1 pair data. Returns the shuffled deck as bytes.
+    """
+    items = list(deck)
+    random.Random(seed).shuffle(items)
+    return bytes(items)
 
-def zkp_generate_permutation_pair(original_deck, seed1=None, seed2=None):
+def shuffle_for_version(deck, seed, version):
+    """
+    Shuffles a deck with the algorithm of a commitment version (see COMMITMENT_V1 and COMMITMENT_V2).
+    """
+    if version == COMMITMENT_V2:
+        return seeded_shuffle(deck, seed)
+    if version == COMMITMENT_V1:
+        return legacy_shuffle(deck, seed)
+    raise ValueError(f"Unknown commitment version {version}")
+
+# Hash state with the v2 domain prefix already absorbed; commitments copy it instead of rehashing the prefix
+_COMMITMENT_V2_PREFIX = hashlib.sha256(b"secure-gin-rummy/commitment/v2:")
+
+def encode_seed(seed):
+    """
+    Canonical binary encoding of a seed: one length byte followed by the big-endian value.
+    """
+    length = (seed.bit_length() + 7) // 8 or 1
+    return bytes((length,)) + seed.to_bytes(length, "big")
+
+def commit_permutation(perm, seed, version=DEFAULT_COMMITMENT_VERSION):
+    """
+    Computes the commitment to a permutation and the seed that produced it.
+
+    :param perm: The permutation as bytes (one byte per card).
+    :param seed: The integer seed.
+    :param version: COMMITMENT_V1 (hex digest of the string form) or COMMITMENT_V2
+                    (raw digest of the canonical binary form, hashed from a copied prefix state).
+    :return: The commitment (str for v1, bytes for v2).
+    """
+    if version == COMMITMENT_V2:
+        h = _COMMITMENT_V2_PREFIX.copy()
+        h.update(bytes((len(perm),)))
+        h.update(perm)
+        h.update(encode_seed(seed))
+        return h.digest()
+    if version == COMMITMENT_V1:
+        return hashlib.sha256((str(list(perm)) + str(seed)).encode()).hexdigest()
+    raise ValueError(f"Unknown commitment version {version}")
+
+def zkp_generate_permutation_pair(original_deck, seed1=None, seed2=None, version=DEFAULT_COMMITMENT_VERSION):
     """
     Generates a pair of permutations for the original deck.
     
@@ -11,25 +109,24 @@ def zkp_generate_permutation_pair(original_deck, seed1=None, seed2=None):
     2. Shuffle the deck using seed1 to obtain perm1 and compute commitment1.
     3. Shuffle perm1 using seed2 to obtain perm2 and compute commitment2.
     
-    :param original_deck: The original deck as a list (e.g., [1, 2, ..., 52])
+    :param original_deck: The original deck as bytes or a list (e.g., [1, 2, ..., 52])
     :param seed1: (Optional) Seed for the first shuffle.
     :param seed2: (Optional) Seed for the second shuffle.
-    :return: A dictionary containing perm1, commitment1, perm2, commitment2, seed1, and seed2.
+    :param version: (Optional) Commitment format, see commit_permutation. It also picks
+                    the shuffle (see shuffle_for_version).
+    :return: A dictionary containing perm1, commitment1, perm2, commitment2, seed1, seed2 and version.
+             The permutations are bytes, one byte per card.
     """
     if seed1 is None:
-        seed1 = secrets.randbits(32)
+        seed1 = secrets.randbits(SEED_BITS)
     if seed2 is None:
-        seed2 = secrets.randbits(32)
+        seed2 = secrets.randbits(SEED_BITS)
     
-    perm1 = original_deck.copy()
-    random.seed(seed1)
-    random.shuffle(perm1)
-    commitment1 = hashlib.sha256((str(perm1) + str(seed1)).encode()).hexdigest()
+    perm1 = shuffle_for_version(original_deck, seed1, version)
+    commitment1 = commit_permutation(perm1, seed1, version)
     
-    perm2 = perm1.copy()
-    random.seed(seed2)
-    random.shuffle(perm2)
-    commitment2 = hashlib.sha256((str(perm2) + str(seed2)).encode()).hexdigest()
+    perm2 = shuffle_for_version(perm1, seed2, version)
+    commitment2 = commit_permutation(perm2, seed2, version)
     
     return {
         "perm1": perm1,
@@ -37,7 +134,8 @@ def zkp_generate_permutation_pair(original_deck, seed1=None, seed2=None):
         "perm2": perm2,
         "commitment2": commitment2,
         "seed1": seed1,
-        "seed2": seed2
+        "seed2": seed2,
+        "version": version
     }
 
 def zkp_simulate_challenge(pair_data):
@@ -75,19 +173,18 @@ def zkp_verify_mapping(original_source, pair_data, challenge_bit, revealed):
     :param challenge_bit: 0 or 1.
     :param revealed: A dictionary with keys "revealed_mapping" and "seed".
     :return: True if verification passes, otherwise False.
+    Pair data without a "version" key is treated as the original v1 format
+    (Mersenne Twister shuffle and hex commitment), as created before versioning.
     """
+    version = pair_data.get("version", COMMITMENT_V1)
     if challenge_bit == 0:
-        expected_perm1 = original_source.copy()
-        random.seed(revealed["seed"])
-        random.shuffle(expected_perm1)
-        expected_commitment = hashlib.sha256((str(expected_perm1) + str(revealed["seed"])).encode()).hexdigest()
-        return (revealed["revealed_mapping"] == expected_perm1) and (expected_commitment == pair_data["commitment1"])
+        expected_perm1 = shuffle_for_version(original_source, revealed["seed"], version)
+        expected_commitment = commit_permutation(expected_perm1, revealed["seed"], version)
+        return (bytes(revealed["revealed_mapping"]) == expected_perm1) and (expected_commitment == pair_data["commitment1"])
     else:
-        expected_perm2 = pair_data["perm1"].copy()
-        random.seed(revealed["seed"])
-        random.shuffle(expected_perm2)
-        expected_commitment = hashlib.sha256((str(expected_perm2) + str(revealed["seed"])).encode()).hexdigest()
-        return (revealed["revealed_mapping"] == expected_perm2) and (expected_commitment == pair_data["commitment2"])
+        expected_perm2 = shuffle_for_version(pair_data["perm1"], revealed["seed"], version)
+        expected_commitment = commit_permutation(expected_perm2, revealed["seed"], version)
+        return (bytes(revealed["revealed_mapping"]) == expected_perm2) and (expected_commitment == pair_data["commitment2"])
 
 def run_party_round(original_deck):
     """
@@ -117,11 +214,117 @@ def run_party_process(original_deck, rounds=100):
     :param original_deck: The initial deck.
     :param rounds: The number of rounds to perform, default is 100.
     :return: (final_deck, True) if all rounds pass, or (None, False) in case of failure.
+             The final deck is returned as a list of card values.
     """
-    deck = original_deck.copy()
+    deck = bytes(original_deck)  # Rounds work on compact byte permutations
     for i in range(rounds):
         deck, valid = run_party_round(deck)
         if not valid:
             print(f"Party round {i+1} failed!")
             return None, False
-    return deck, True
+    return list(deck), True
+
+
+def generate_party_transcript(original_deck, rounds=100):
+    """
+    Runs the generation and challenge steps of every round for one party without
+    verifying them, so the checks can be batched afterwards.
+    Round i starts from the deck chosen in round i-1, exactly as in run_party_process.
+
+    :param original_deck: The initial deck.
+    :param rounds: The number of rounds to perform.
+    :return: (final_deck, transcript) where final_deck is bytes and transcript is a list of
+             (source, pair_data, challenge_bit, revealed) tuples, one per round.
+    """
+    deck = bytes(original_deck)
+    transcript = []
+    for _ in range(rounds):
+        pair_data = zkp_generate_permutation_pair(deck)
+        challenge_bit = zkp_simulate_challenge(pair_data)
+        revealed = zkp_reveal_mapping(pair_data, challenge_bit)
+        transcript.append((deck, pair_data, challenge_bit, revealed))
+        deck = pair_data["perm1"] if challenge_bit == 0 else pair_data["perm2"]
+    return deck, transcript
+
+def verify_transcript_rounds(rounds):
+    """
+    Verifies a batch of transcript rounds independently of each other.
+    This is a top-level function so it can run in a worker process.
+
+    :param rounds: A list of (source, pair_data, challenge_bit, revealed) tuples.
+    :return: True if every round verifies, otherwise False.
+    """
+    for source, pair_data, challenge_bit, revealed in rounds:
+        verify_source = source if challenge_bit == 0 else pair_data["perm1"]
+        if not zkp_verify_mapping(verify_source, pair_data, challenge_bit, revealed):
+            return False
+    return True
+
+def transcript_is_chained(original_deck, transcript, final_deck):
+    """
+    Checks that each round starts from the deck chosen in the previous round and that
+    the last round ends in final_deck. This is cheap and is done before the batch checks.
+    """
+    deck = bytes(original_deck)
+    for source, pair_data, challenge_bit, revealed in transcript:
+        if source != deck:
+            return False
+        deck = pair_data["perm1"] if challenge_bit == 0 else pair_data["perm2"]
+    return deck == final_deck
+
+def submit_transcript_verification(transcript, executor, chunks):
+    """
+    Splits a transcript into chunks and submits each one to the executor.
+    Returns the list of futures.
+    """
+    size = max(1, -(-len(transcript) // chunks))
+    return [executor.submit(verify_transcript_rounds, transcript[i:i + size])
+            for i in range(0, len(transcript), size)]
+
+def create_verification_pool(workers=None):
+    """
+    Creates a process pool for batched shuffle verification, or returns None when
+    fewer than two workers are available (verification then stays inline).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 2:
+        return None
+    return ProcessPoolExecutor(max_workers=workers)
+
+def run_two_party_shuffle(original_deck, rounds=100, executor=None, chunks=None):
+    """
+    Runs the full secure shuffle: "Alice" shuffles the deck, then "Bob" shuffles
+    Alice's result, each over the given number of rounds.
+
+    Without an executor this is run_party_process twice. With an executor (see
+    create_verification_pool), each party first produces its whole transcript and
+    the round checks are verified in batches on the worker processes; Alice's
+    checks run while Bob is still generating his rounds.
+
+    :param original_deck: The initial deck.
+    :param rounds: The number of rounds per party, default is 100.
+    :param executor: (Optional) A concurrent.futures executor for batch verification.
+    :param chunks: (Optional) Number of batches per party, defaults to the CPU count.
+    :return: (final_deck, True) if both parties pass, or (None, False) in case of failure.
+    """
+    if executor is None:
+        deck_after_alice, alice_ok = run_party_process(original_deck, rounds)
+        if not alice_ok:
+            return None, False
+        return run_party_process(deck_after_alice, rounds)
+
+    if chunks is None:
+        chunks = os.cpu_count() or 1
+    futures = []
+    deck = bytes(original_deck)
+    for _ in range(2):
+        final_deck, transcript = generate_party_transcript(deck, rounds)
+        if not transcript_is_chained(deck, transcript, final_deck):
+            return None, False
+        futures.extend(submit_transcript_verification(transcript, executor, chunks))
+        deck = final_deck
+    if not all(future.result() for future in futures):
+        print("Batched shuffle verification failed!")
+        return None, False
+    return list(deck), True
@@ -1,10 +1,12 @@
 import hashlib
 import secrets
+from metrics import metrics
 
 def generate_salt():
     """Generates a secure random salt."""
     return secrets.token_hex(16)
 
+@metrics.timed("call", "hand_commitments")
 def create_hand_commitments(hand):
     """
     Computes a commitment for each card in the hand by concatenating the card value with a salt
@@ -20,6 +22,7 @@ def create_hand_commitments(hand):
         commitments[card] = (commitment, salt)
     return commitments
 
+@metrics.timed("call", "discard_proof")
 def generate_discard_proof(card, commitments):
     """
     Generates a discard proof for the selected card by revealing its corresponding salt.
@@ -36,6 +39,7 @@ def generate_discard_proof(card, commitments):
     else:
         raise Exception("Card not found in hand commitments!")
 
+@metrics.timed("call", "verify_discard_proof")
 def verify_discard_proof(proof, commitments):
     """
     Verifies the discard proof by computing the SHA-256 hash of (card + salt) and comparing it
@@ -1,20 +1,28 @@
 import React from "react";
 import io from "socket.io-client";
 import Board from "./Board";
+import Spectator from "./Spectator";
+import { workerUrl } from "./workerRouting";
 import "./styles.css";
 
-// Create a socket connection to the backend server at localhost:5000
-export const socket = io("http://localhost:5000");
+// Create a socket connection to the backend worker hosting the table (localhost:5000 by default)
+const tableParam = new URLSearchParams(window.location.search).get("table") || "default";
+export const socket = io(workerUrl(tableParam));
 
 // Main App component that renders the entire application
 function App() {
+  // ?spectate=1 opens a read-only view of the table instead of a player seat
+  const params = new URLSearchParams(window.location.search);
+  const tableId = params.get("table") || "default";
+  const spectating = params.has("spectate");
+
   return (
     <div className="app-container">
       {/* Title of the game with the "title" CSS class for styling */}
       <h1 className="title">Gin Rummy</h1>
       
-      {/* Render the Board component, passing the socket connection as a prop */}
-      <Board socket={socket} />
+      {/* Render the Board component (or the spectator view), passing the socket connection as a prop */}
+      {spectating ? <Spectator socket={socket} tableId={tableId} /> : <Board socket={socket} />}
     </div>
   );
 }
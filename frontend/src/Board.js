@@ -1,13 +1,34 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import Card from "./Card"; // Component for displaying a card in the discard pile
 import Player from "./Player";
+import { decodeState } from "./binaryProtocol";
+
+// Applies the hand operations of a state_delta (see backend/PROTOCOL.md) to a copy of the hand
+function applyHandOps(hand, ops) {
+  const next = [...hand];
+  ops.forEach((op) => {
+    if (op[0] === "remove") {
+      next.splice(op[1], 1);
+    } else if (op[0] === "add") {
+      next.splice(op[1], 0, op[2]);
+    } else if (op[0] === "move") {
+      const [moved] = next.splice(op[1], 1);
+      next.splice(op[2], 0, moved);
+    }
+  });
+  return next;
+}
 
 function Board({ socket }) {
+  // Table id comes from the URL (?table=...), so several matches can share one server
+  const tableId = new URLSearchParams(window.location.search).get("table") || "default";
+
   // State variables for managing game data
   const [deckSize, setDeckSize] = useState(52);
   const [playerTurn, setPlayerTurn] = useState("");
   const [message, setMessage] = useState("");
   const [myHand, setMyHand] = useState([]);
+  const [deadwood, setDeadwood] = useState(null);
   const [playerId, setPlayerId] = useState("");
   const [pending, setPending] = useState(null);
   const [discardString, setDiscardString] = useState(null);
@@ -15,6 +36,8 @@ function Board({ socket }) {
   const [gameOver, setGameOver] = useState(false);
   const [roundFinished, setRoundFinished] = useState(false); // Indicates that the round has ended and "Next Round" has been pressed
   const [isDrawing, setIsDrawing] = useState(false);
+  const stateRef = useRef({}); // Last full state received, kept up to date by snapshots and deltas
+  const seqRef = useRef(0); // Sequence number of the last snapshot or delta applied
   const [, setUpdate] = useState(0);
   const forceUpdate = () => {
     setUpdate((prev) => prev + 1);
@@ -28,39 +51,101 @@ function Board({ socket }) {
       return;
     }
     setPlayerId(id);
-    socket.emit("join_game", { player: id });
+    socket.emit("join_game", { player: id, table: tableId, protocol: "delta", encoding: "msgpack" });
+
+    // Renders a full state; message is only shown when present
+    const applyState = (data) => {
+      setDeckSize(data.deck_size || 0);
+      setPlayerTurn(data.turn || "");
+      setPending(data.pending || null);
+      if (data.hand !== undefined && data.hand !== null) {
+        setMyHand(data.hand);
+      }
+      if (data.deadwood !== undefined) {
+        setDeadwood(data.deadwood);
+      }
+      if (data.scores) {
+        setScores(data.scores);
+      }
+      setDiscardString(data.discard_string || null);
+      setIsDrawing(false); // Reset isDrawing when update is received
+
+      if (data.message && data.message.toLowerCase().includes("new round started")) {
+        setMessage("");
+        setRoundFinished(false);
+        setGameOver(false);
+      } else if (data.message) {
+        setMessage(data.message);
+        if (data.message.toLowerCase().includes("round")) {
+          setRoundFinished(false);
+        }
+      }
+    };
+
+    // Stores everything except the one-off message as the current state
+    const storeState = (data) => {
+      const { message: _message, ...state } = data;
+      stateRef.current = state;
+    };
+
+    const handleSnapshot = (data) => {
+      seqRef.current = data.seq;
+      storeState(data.state);
+      applyState(data.state);
+    };
 
+    const handleDelta = (data) => {
+      if (data.seq !== seqRef.current + 1) {
+        // An update was missed, ask the server for a full snapshot
+        socket.emit("resync", { player: id, table: tableId });
+        return;
+      }
+      seqRef.current = data.seq;
+      const next = { ...stateRef.current, ...data.changes };
+      if (data.hand) {
+        next.hand = applyHandOps(stateRef.current.hand || [], data.hand);
+      }
+      stateRef.current = next;
+      applyState({ ...next, message: data.message });
+    };
+
+    socket.on("state_snapshot", handleSnapshot);
+    socket.on("state_delta", handleDelta);
+
+    // Snapshots and deltas arrive as msgpack envelopes when the server supports the binary encoding
+    socket.on("state_binary", (buffer) => {
+      const { type, payload } = decodeState(buffer);
+      if (type === "snapshot") {
+        handleSnapshot(payload);
+      } else {
+        handleDelta(payload);
+      }
+    });
+
+    // Table-wide broadcasts still arrive as update_game payloads
     socket.on("update_game", (data) => {
       if (data.error) {
         alert(data.error);
       } else {
-        setDeckSize(data.deck_size || 0);
-        setPlayerTurn(data.turn || "");
-        setPending(data.pending || null);
-        if (data.hand !== undefined && data.hand !== null) {
-          setMyHand(data.hand);
-        }
-        if (data.scores) {
-          setScores(data.scores);
-        }
-        setDiscardString(data.discard_string || null);
-        setIsDrawing(false); // Reset isDrawing when update is received
-
-        if (data.message && data.message.toLowerCase().includes("new round started")) {
-          setMessage("");
-          setRoundFinished(false);
-          setGameOver(false);
-        } else if (data.message) {
-          setMessage(data.message);
-          if (data.message.toLowerCase().includes("round")) {
-            setRoundFinished(false);
-          }
-        }
+        storeState({ ...stateRef.current, ...data });
+        applyState({ ...stateRef.current, message: data.message });
       }
     });
 
     socket.on("round_over", (data) => {
-      setMessage(`${data.winner} won this round! Reason: ${data.reason}, Points: ${data.points}`);
+      // Append each player's melds and deadwood when the server sends the arrangement
+      const details = data.hands
+        ? Object.entries(data.hands)
+            .map(([name, hand]) => {
+              const melds = hand.melds.map((meld) => `[${meld.join(", ")}]`).join(" ");
+              return `${name}: ${melds || "no melds"}, deadwood ${hand.deadwood}`;
+            })
+            .join(" | ")
+        : "";
+      setMessage(
+        `${data.winner} won this round! Reason: ${data.reason}, Points: ${data.points}` +
+          (details ? ` (${details})` : "")
+      );
       setGameOver(false);
       setRoundFinished(false);
     });
@@ -78,20 +163,29 @@ function Board({ socket }) {
     socket.on("knock_error", (data) => {
       alert(data.error);
     });
+
+    // The server we reached does not host this table: REACT_APP_WORKERS does not match the cluster
+    socket.on("wrong_worker", (data) => {
+      setMessage(`Table ${data.table} is hosted by ${data.url}; check REACT_APP_WORKERS`);
+    });
     
     return () => {
+      socket.off("state_snapshot");
+      socket.off("state_delta");
+      socket.off("state_binary");
       socket.off("update_game");
       socket.off("round_over");
       socket.off("game_over");
       socket.off("knock_error");
+      socket.off("wrong_worker");
     };
-  }, [socket]);
+  }, [socket, tableId]);
 
   // Handler for drawing a card from the stock pile
   const handleDrawFromStock = () => {
     if (isDrawing) return; // Block if already drawing
     setIsDrawing(true);
-    socket.emit("draw_card", { player: playerId, source: "stock" });
+    socket.emit("draw_card", { player: playerId, table: tableId, source: "stock" });
     forceUpdate();
   };
 
@@ -99,25 +193,25 @@ function Board({ socket }) {
   const handleTakeDiscard = () => {
     if (isDrawing) return;
     setIsDrawing(true);
-    socket.emit("draw_card", { player: playerId, source: "discard" });
+    socket.emit("draw_card", { player: playerId, table: tableId, source: "discard" });
     forceUpdate();
   };
 
   // Handler for discarding a card; cardIndex indicates which card is being discarded
   const handleDiscardCard = (cardIndex) => {
-    socket.emit("discard_card", { player: playerId, cardIndex });
+    socket.emit("discard_card", { player: playerId, table: tableId, cardIndex });
     forceUpdate();
   };
 
   // Handler for the knock action
   const handleKnock = () => {
-    socket.emit("knock", { player: playerId });
+    socket.emit("knock", { player: playerId, table: tableId });
     forceUpdate();
   };
 
   // Handler for starting the next round
   const handleNextRound = () => {
-    socket.emit("new_round");
+    socket.emit("new_round", { table: tableId });
     setMessage("");
     setMyHand([]);
     setGameOver(false);
@@ -126,7 +220,7 @@ function Board({ socket }) {
 
   // Handler for starting a completely new game
   const handleNewGame = () => {
-    socket.emit("new_game");
+    socket.emit("new_game", { table: tableId });
     setMessage("");
     setMyHand([]);
     setGameOver(false);
@@ -177,6 +271,7 @@ function Board({ socket }) {
 
       {/* Display the current turn */}
       <h3>Current Turn: {playerTurn}</h3>
+      {deadwood !== null && <p>Your deadwood: {deadwood}</p>}
       {pending === playerId && myHand.length !== 11 ? (
         <p>Please click on a card in your hand to discard.</p>
       ) : (
@@ -197,6 +292,7 @@ function Board({ socket }) {
       <div className="players">
         <Player
           name={playerId}
+          tableId={tableId}
           hand={myHand}
           onCardClick={pending === playerId ? handleDiscardCard : undefined}
         />
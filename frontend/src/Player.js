@@ -3,7 +3,7 @@ import { socket } from "./App";
 import Card from "./Card";
 import "./styles.css";
 
-function Player({ name, hand = [], onCardClick }) {
+function Player({ name, tableId, hand = [], onCardClick }) {
   // Initialize local state for the player's hand
   const [localHand, setLocalHand] = useState(hand);
 
@@ -31,7 +31,7 @@ function Player({ name, hand = [], onCardClick }) {
     const [moved] = newHand.splice(fromIndex, 1);
     newHand.splice(toIndex, 0, moved);
     setLocalHand(newHand);
-    socket.emit("new_hand", { player: name, toIndex: toIndex, fromIndex: fromIndex });
+    socket.emit("new_hand", { player: name, table: tableId, toIndex: toIndex, fromIndex: fromIndex });
   };
 
   // If there are no cards in the hand, display a message
@@ -0,0 +1,89 @@
+import React, { useEffect, useState } from "react";
+import Card from "./Card";
+
+const LOG_LENGTH = 10; // Number of recent table events shown to viewers
+
+// Describes a public table event in one line
+function describeEvent(data) {
+  switch (data.event) {
+    case "draw":
+      return `${data.player} drew from ${data.source}`;
+    case "discard":
+      return `${data.player} discarded ${data.card}`;
+    case "round_over":
+      return `${data.result.winner} won the round (${data.result.reason}, ${data.result.points} points)`;
+    case "game_over":
+      return `${data.result.winner} won the game with ${data.result.score} points`;
+    case "new_round":
+      return "New round started";
+    case "new_game":
+      return "New game started";
+    default:
+      return data.event;
+  }
+}
+
+function Spectator({ socket, tableId }) {
+  // Public table state only: spectators never receive hands
+  const [state, setState] = useState(null);
+  const [events, setEvents] = useState([]);
+
+  useEffect(() => {
+    let lastSeq = 0;
+    socket.emit("spectate", { table: tableId });
+
+    socket.on("spectator_snapshot", (data) => {
+      lastSeq = data.seq;
+      setState(data.state);
+    });
+
+    socket.on("table_event", (data) => {
+      // Events already covered by a snapshot are skipped
+      if (data.seq <= lastSeq) return;
+      lastSeq = data.seq;
+      setState(data.state);
+      setEvents((prev) => [describeEvent(data), ...prev].slice(0, LOG_LENGTH));
+    });
+
+    return () => {
+      socket.off("spectator_snapshot");
+      socket.off("table_event");
+    };
+  }, [socket, tableId]);
+
+  if (!state) {
+    return <p>Connecting to table {tableId}...</p>;
+  }
+
+  return (
+    <div className="board-container" style={{ fontFamily: "'Montserrat', sans-serif" }}>
+      <h3>Watching table {tableId}</h3>
+      <div className="score-board">
+        <h3>Scores</h3>
+        <p>Player 1: {state.scores.player1} | Player 2: {state.scores.player2}</p>
+      </div>
+      <div className="stock-discard-row">
+        <div className="stock-pile">
+          <p>({state.deck_size} cards)</p>
+        </div>
+        <div className="discard-pile">
+          {state.discard_string && (
+            <Card
+              cardText={state.discard_string}
+              style={{ width: "90px", height: "140px", margin: "0 auto" }}
+            />
+          )}
+          <p>Discard</p>
+        </div>
+      </div>
+      <h3>Current Turn: {state.turn}</h3>
+      <ul className="event-log">
+        {events.map((line, index) => (
+          <li key={index}>{line}</li>
+        ))}
+      </ul>
+    </div>
+  );
+}
+
+export default Spectator;
@@ -0,0 +1,63 @@
+import { decode } from "@msgpack/msgpack";
+
+// Decoder for the msgpack state envelopes sent on "state_binary" (see backend/binary.py
+// and backend/PROTOCOL.md). Payloads are turned back into the JSON snapshot/delta shapes.
+
+const SNAPSHOT = 0;
+const FIELDS = ["deck_size", "turn", "pending", "deadwood", "opponent_count", "discard_string", "scores", "hand"];
+const OPS = ["remove", "add", "move"];
+const PLAYERS = [null, "player1", "player2"];
+
+// Card id (1-52) -> card string, built exactly like backend/cards.py
+const SUITS = ["Hearts", "Diamonds", "Clubs", "Spades"];
+const RANK_NAMES = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"];
+const CARD_STRINGS = [null];
+SUITS.forEach((suit) => RANK_NAMES.forEach((rank) => CARD_STRINGS.push(`${suit} ${rank}`)));
+
+function decodeField(field, value) {
+  switch (field) {
+    case "hand":
+      return Array.from(value, (card) => CARD_STRINGS[card]);
+    case "discard_string":
+      return value ? CARD_STRINGS[value] : null;
+    case "turn":
+    case "pending":
+      return PLAYERS[value];
+    case "scores":
+      return { player1: value[0], player2: value[1] };
+    default:
+      return value;
+  }
+}
+
+function decodeFields(fields) {
+  const decoded = {};
+  Object.entries(fields).forEach(([code, value]) => {
+    const field = FIELDS[Number(code)];
+    decoded[field] = decodeField(field, value);
+  });
+  return decoded;
+}
+
+// Returns { type: "snapshot" | "delta", payload } for one binary message
+export function decodeState(buffer) {
+  const envelope = decode(new Uint8Array(buffer));
+  const [protocol, kind, seq, fields] = envelope;
+  if (kind === SNAPSHOT) {
+    const state = decodeFields(fields);
+    if (envelope[4]) {
+      state.message = envelope[4];
+    }
+    return { type: "snapshot", payload: { protocol, seq, state } };
+  }
+  const payload = { protocol, seq, changes: decodeFields(fields) };
+  if (envelope[4].length) {
+    payload.hand = envelope[4].map((op) =>
+      OPS[op[0]] === "add" ? ["add", op[1], CARD_STRINGS[op[2]]] : [OPS[op[0]], ...op.slice(1)]
+    );
+  }
+  if (envelope[5]) {
+    payload.message = envelope[5];
+  }
+  return { type: "delta", payload };
+}
@@ -0,0 +1,34 @@
+// Picks the backend worker that hosts a table. With several workers (see
+// backend/cluster.py), list their URLs in shard order in REACT_APP_WORKERS,
+// e.g. REACT_APP_WORKERS=http://localhost:5001,http://localhost:5002
+const DEFAULT_SERVER = "http://localhost:5000";
+
+const WORKERS = (process.env.REACT_APP_WORKERS || "")
+  .split(",")
+  .map((url) => url.trim())
+  .filter(Boolean);
+
+// CRC-32 lookup table (same checksum as zlib.crc32 on the backend)
+const CRC_TABLE = Array.from({ length: 256 }, (_, n) => {
+  let c = n;
+  for (let k = 0; k < 8; k++) {
+    c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+  }
+  return c >>> 0;
+});
+
+function crc32(text) {
+  let crc = 0xffffffff;
+  for (const byte of new TextEncoder().encode(text)) {
+    crc = CRC_TABLE[(crc ^ byte) & 0xff] ^ (crc >>> 8);
+  }
+  return (crc ^ 0xffffffff) >>> 0;
+}
+
+// Returns the URL of the worker owning tableId, like cluster.owner_url on the backend
+export function workerUrl(tableId) {
+  if (WORKERS.length === 0) {
+    return DEFAULT_SERVER;
+  }
+  return WORKERS[crc32(tableId) % WORKERS.length];
+}